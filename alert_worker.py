@@ -0,0 +1,78 @@
+# alert_worker.py
+"""
+Headless long-wait alert worker. Reuses the data/ pipeline (load -> clean) and feeds new
+status events into data.alerts.LongWaitEvaluator; alerts go to the configured sinks.
+
+    python alert_worker.py              # poll every ALERT_POLL_SECONDS
+    python alert_worker.py --once       # single pass (cron / testing)
+"""
+import argparse
+import logging
+import time
+
+from config.config import ALERT_POLL_SECONDS
+from data.loader import load_snapshot
+from data.processor import clean_sheet_dfs
+from data.alerts import LongWaitEvaluator, build_sinks, dispatch, load_fired, save_fired, prune_fired
+from utils.time_utils import now_epoch_ns
+
+logger = logging.getLogger("alert_worker")
+
+
+def new_status_events(dfs, seen):
+    """Status rows not fed before, in Timestamp order, with product + direction attached."""
+    status = dfs['status'].dropna(subset=["Timestamp", "Truck_Plate_Number"]).sort_values("Timestamp", kind="stable")
+    security = dfs['security']
+    if "Coming_to_Upload_or_Unload" in security.columns:
+        direction = security.groupby("Truck_Plate_Number")["Coming_to_Upload_or_Unload"].agg("first").to_dict()
+    else:
+        direction = {}
+
+    for plate, state, ts, product in zip(
+        status["Truck_Plate_Number"], status["Status"], status["Timestamp"], status["Product_Group"]
+    ):
+        key = (int(ts), plate, state)
+        if key in seen:
+            continue
+        seen.add(key)
+        yield plate, state, int(ts), product, direction.get(plate)
+
+
+def run(once=False, interval=ALERT_POLL_SECONDS):
+    evaluator = LongWaitEvaluator(fired=load_fired())
+    sinks = build_sinks()
+    seen = set()
+    last_version = None
+
+    while True:
+        try:
+            # the push endpoint belongs to the app (or snapshot_worker.py), not to this worker
+            raw_dfs, manifest = load_snapshot(ingest=False)
+            if manifest["version"] != last_version:
+                dfs = clean_sheet_dfs(raw_dfs)
+                for plate, state, ts, product, direction in new_status_events(dfs, seen):
+                    evaluator.on_event(plate, state, ts, product, direction)
+                last_version = manifest["version"]
+
+            now = now_epoch_ns()
+            fired = list(evaluator.evaluate(now))
+            for alert in fired:
+                dispatch(alert, sinks)
+            if fired:
+                evaluator.fired = prune_fired(evaluator.fired, now)
+                save_fired(evaluator.fired)
+        except Exception:
+            logger.exception("alert pass failed")
+
+        if once:
+            return
+        time.sleep(interval)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Headless long-wait alert worker")
+    parser.add_argument("--once", action="store_true")
+    parser.add_argument("--interval", type=int, default=ALERT_POLL_SECONDS)
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    run(once=args.once, interval=args.interval)
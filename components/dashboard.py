@@ -0,0 +1,166 @@
+# components/dashboard.py
+import streamlit as st
+from streamlit_autorefresh import st_autorefresh
+
+from config.config import REFRESH_INTERVAL_SECONDS, DEBUG_MODE, SITES, DEFAULT_SITE, SHARED_SNAPSHOT_DIR, SHARED_SNAPSHOT_MAX_AGE_SECONDS
+from data.loader import get_current_date_from_sheets, reset_poll_schedule, poll_status, load_snapshot
+from data.pipeline import Pipeline
+from data.shared_snapshot import read_pointer, pointer_age
+from utils.time_utils import now_local, localize_frame
+
+from components.sidebar import render_sidebar
+from components.export_panel import render_export_panel
+from components.status_summary import render_status_summary
+from components.current_waiting import render_current_waiting
+from components.loading_durations_status import render_loading_durations_status
+from components.daily_performance import render_daily_performance
+from components.sla_percentiles import render_sla_percentiles
+from components.site_overview import show_site_overview
+from components.yard_activity import select_activity_range, render_yard_activity
+
+
+# section label -> renderer(pipeline, sidebar values); each pulls only the stages it needs
+SECTIONS = {
+    "Status summary": lambda pipe, sb: render_status_summary(pipe.get("status_summary")),
+    "Current waiting": lambda pipe, sb: render_current_waiting(
+        pipe.get("waiting"), pipe.get("asof").as_of if pipe.get("asof") is not None else None),
+    "Loading durations": lambda pipe, sb: render_loading_durations_status(pipe.get("loading_durations")),
+    "Daily performance": lambda pipe, sb: render_daily_performance(pipe.get("daily_performance")),
+    "SLA percentiles": lambda pipe, sb: render_sla_percentiles(
+        pipe.get("sla"), sb["selected_date"], sb["product_selected"], sb["upload_type"]),
+    "Yard activity": lambda pipe, sb: _yard_activity(pipe),
+}
+
+
+def _yard_activity(pipe):
+    st.subheader("Yard Activity")
+    pipe.set_params(activity_days=select_activity_range())
+    render_yard_activity(pipe.get("activity"))
+
+
+def safe_rerun():
+    """
+    Try to rerun the Streamlit script in a robust way across Streamlit versions/environments:
+      1. Preferred: st.experimental_rerun()
+      2. Fallback: HTML meta refresh (reload page)
+      3. Final fallback: st.stop() (stops execution — user can refresh)
+    """
+    try:
+        return st.experimental_rerun()
+    except Exception:
+        # Fallback 1: meta refresh in browser
+        try:
+            st.markdown("<meta http-equiv='refresh' content='0'>", unsafe_allow_html=True)
+            return
+        except Exception:
+            pass
+        # Fallback 2: stop execution
+        try:
+            st.stop()
+            return
+        except Exception:
+            return
+
+
+def _snapshot_watcher(site, version):
+    """
+    Fragment body run every REFRESH_INTERVAL_SECONDS: poll the site's sheets (adaptive cadence)
+    and rerun the whole app only when the snapshot changed. Waiting minutes tick client-side
+    in between, so unchanged data costs no full rerun.
+    """
+    _, manifest = load_snapshot(site)
+    if manifest["version"] != version:
+        st.rerun()
+
+
+def run_dashboard(page_title, title, mode, autorefresh_key, show_footer=True):
+    """
+    The dashboard shared by main_app / host_app / local_app: sidebar, refresh handling,
+    export, debug panel and the visible sections, all fed by one lazy data/pipeline.Pipeline.
+    `mode` is the label used in the debug panel and footer ("host" / "local").
+    """
+    st.set_page_config(page_title=page_title, layout="wide")
+    st.title(title)
+
+    # selected site (sidebar selector writes st.session_state["site"]); loading also activates its timezone
+    site = st.session_state.get("site", DEFAULT_SITE)
+    if site not in SITES:
+        site = DEFAULT_SITE
+    pipe = Pipeline(site)
+    raw_dfs, manifest = pipe.get("raw")
+    default_date = get_current_date_from_sheets(raw_dfs, manifest)
+
+    sb = render_sidebar(default_date, REFRESH_INTERVAL_SECONDS, sites=SITES, sections=SECTIONS)
+    pipe.set_params(
+        selected_date=sb["selected_date"],
+        product_selected=sb["product_selected"],
+        upload_type=sb["upload_type"],
+        as_of_time=sb["as_of_time"],
+    )
+
+    # Auto refresh: rerun on snapshot changes only (needs st.fragment); otherwise every n seconds.
+    # Time travel shows a fixed instant, so there is nothing to refresh.
+    if sb["auto_refresh"] and sb["as_of_time"] is None:
+        if hasattr(st, "fragment"):
+            st.fragment(_snapshot_watcher, run_every=REFRESH_INTERVAL_SECONDS)(site, manifest["version"])
+        else:
+            st_autorefresh(interval=REFRESH_INTERVAL_SECONDS * 1000, key=autorefresh_key)
+
+    # Manual refresh button
+    if sb["manual_refresh"]:
+        st.info("Refreshing data...")
+        reset_poll_schedule()
+        try:
+            st.cache_data.clear()
+        except Exception:
+            try:
+                st.caching.clear_cache()
+            except Exception:
+                pass
+        safe_rerun()
+
+    # sidebar export (streams the chosen range day by day)
+    render_export_panel(pipe.get("clean"), default_date, sb["product_selected"], sb["upload_type"])
+
+    if DEBUG_MODE:
+        with st.sidebar.expander(f"Debug ({mode})", expanded=False):
+            dfs = pipe.get("clean")
+            st.write(f"🕒 Now ({SITES[site]['timezone']}):", now_local().isoformat())
+            st.write(f"Snapshot version {manifest['version']}")
+            if SHARED_SNAPSHOT_DIR:
+                pointer = read_pointer(site)
+                if pointer is None:
+                    shared = "none published yet, fetching locally"
+                else:
+                    age = pointer_age(pointer)
+                    shared = f"#{pointer['seq']}, confirmed {age:.0f}s ago"
+                    if age > SHARED_SNAPSHOT_MAX_AGE_SECONDS:
+                        shared += " (stale, fetching locally)"
+                st.write("Shared snapshot (snapshot_worker.py):", shared)
+            st.write("Sheet polling (adaptive cadence):")
+            st.dataframe(poll_status(), hide_index=True)
+            for name in ("status", "security"):
+                if not dfs[name].empty and "Timestamp" in dfs[name].columns:
+                    st.write(f"Recent {name} records (last 10):")
+                    st.write(localize_frame(dfs[name].sort_values("Timestamp").tail(10), ["Timestamp"]))
+            st.caption(f"Debug mode active ({mode}).")
+
+    if sb["as_of_time"] is not None:
+        st.info(f"🕰️ Showing {sb['selected_date']} as of {sb['as_of_time']:%H:%M}")
+
+    # cross-site overview (only with several sites)
+    if len(SITES) > 1:
+        show_site_overview()
+        st.divider()
+
+    visible = [s for s in SECTIONS if sb["sections"] is None or s in sb["sections"]]
+    for i, section in enumerate(visible):
+        if i:
+            st.divider()
+        SECTIONS[section](pipe, sb)
+
+    if show_footer:
+        st.markdown("---")
+        st.caption(f"🔄 Checking for new data every {REFRESH_INTERVAL_SECONDS} seconds ({mode} mode).")
+        if DEBUG_MODE:
+            st.caption(f"🧑‍💻 Debug mode active — {mode} environment.")
@@ -0,0 +1,40 @@
+# components/export_panel.py
+import os
+import tempfile
+import streamlit as st
+from data.export import FrameSource, export_table, TABLES, FORMATS
+
+
+def render_export_panel(dfs, default_date, product_selected=None, upload_type=None):
+    """
+    Sidebar export: stream a KPI table for a date range to a temp file (day by day),
+    then offer it as a download. Uses the current sidebar product / upload filters.
+    """
+    with st.sidebar.expander("Export", expanded=False):
+        table = st.selectbox("Table", options=list(TABLES), key="export_table")
+        date_range = st.date_input("Date range", value=(default_date.replace(day=1), default_date), key="export_range")
+        fmt = st.selectbox("Format", options=list(FORMATS), key="export_format")
+
+        if not isinstance(date_range, (list, tuple)) or len(date_range) != 2:
+            st.caption("Pick a start and an end date.")
+            return
+        start, end = date_range
+
+        if st.button("Prepare export", key="export_prepare"):
+            previous = st.session_state.get("export_file")
+            if previous and os.path.exists(previous[0]):
+                os.remove(previous[0])
+            fd, path = tempfile.mkstemp(suffix=f".{fmt}")
+            os.close(fd)
+            try:
+                rows = export_table(FrameSource(dfs), table, start, end, fmt, path, product_selected, upload_type)
+            except ImportError:
+                st.error("Parquet export needs pyarrow installed.")
+                return
+            st.session_state["export_file"] = (path, f"{table}_{start}_{end}.{fmt}", rows)
+
+        if "export_file" in st.session_state:
+            path, name, rows = st.session_state["export_file"]
+            if os.path.exists(path):
+                with open(path, "rb") as f:
+                    st.download_button(f"Download {name} ({rows} rows)", data=f, file_name=name, key="export_download")
@@ -1,14 +1,32 @@
 # components/sidebar.py
 import streamlit as st
 from streamlit_autorefresh import st_autorefresh
-from datetime import date
+from datetime import date, time, timedelta
 
-def render_sidebar(default_date, refresh_interval_seconds):
+def render_sidebar(default_date, refresh_interval_seconds, sites=None, sections=None):
     st.sidebar.title("Filters & Refresh")
 
+    # Site selector (disabled while only one site is configured); the app reads
+    # st.session_state["site"] before loading, so a change reruns on the new site
+    site = None
+    if sites:
+        site = st.sidebar.selectbox(
+            "Site", options=list(sites), key="site",
+            format_func=lambda s: sites[s].get("name", s),
+            disabled=len(sites) < 2,
+        )
+
     # Date picker default to last date found in sheet
     selected_date = st.sidebar.date_input("Select date", value=default_date)
 
+    # Time travel: show the selected date as it looked at a given local time
+    as_of_time = None
+    if st.sidebar.checkbox("Time travel (as of)", value=False, key="time_travel"):
+        as_of_time = st.sidebar.slider(
+            "As of", min_value=time(0, 0), max_value=time(23, 55), value=time(12, 0),
+            step=timedelta(minutes=5), format="HH:mm", key="as_of_time",
+        )
+
     # Auto refresh
     auto_refresh = st.sidebar.checkbox("Auto refresh", value=True)
     # If auto refresh enabled, use st_autorefresh in main with given interval.
@@ -23,15 +41,23 @@ def render_sidebar(default_date, refresh_interval_seconds):
     product_options = ["Pipe", "Coil", "Trading", "Roofing", "PU", "Other"]
     product_selected = st.sidebar.multiselect("Product Group", options=product_options, default=product_options)
 
+    # Visible sections (hidden ones are not computed at all)
+    sections_selected = None
+    if sections:
+        sections_selected = st.sidebar.multiselect("Sections", options=list(sections), default=list(sections), key="sections")
+
     # compact info
     st.sidebar.markdown("---")
     st.sidebar.markdown(f"Auto-refresh: ⏱️ {refresh_interval_seconds}s")
     # st.sidebar.markdown("Data source: Google Sheets")
 
     return {
+        "site": site,
         "selected_date": selected_date,
+        "as_of_time": as_of_time,
         "auto_refresh": auto_refresh,
         "manual_refresh": manual_refresh,
         "upload_type": None if upload_type == "All" else upload_type,
-        "product_selected": product_selected
+        "product_selected": product_selected,
+        "sections": sections_selected
     }
@@ -0,0 +1,27 @@
+# components/site_overview.py
+import streamlit as st
+import pandas as pd
+from data.sites import all_site_rollups
+
+
+def show_site_overview():
+    """
+    Cross-site overview: today's trucks / waiting / loading / completed and average
+    durations for every configured site (per-site rollups computed in parallel).
+    """
+    st.subheader("All Sites — Today")
+    df = all_site_rollups()
+    if df.empty:
+        st.info("No sites configured.")
+        return
+
+    ok = df[df["Error"].isna()] if "Error" in df.columns else df
+    col1, col2, col3, col4 = st.columns(4)
+    col1.metric("🚚 Trucks", int(ok["Trucks"].sum()) if "Trucks" in ok else 0)
+    col2.metric("🕒 Waiting", int(ok["Waiting"].sum()) if "Waiting" in ok else 0)
+    col3.metric("⚙️ Loading", int(ok["Loading"].sum()) if "Loading" in ok else 0)
+    col4.metric("✅ Completed", int(ok["Completed"].sum()) if "Completed" in ok else 0)
+
+    if "Last_event" in df.columns:
+        df["Last_event"] = df["Last_event"].map(lambda t: "" if pd.isna(t) else t.strftime("%Y-%m-%d %H:%M"))
+    st.dataframe(df.drop(columns=["Site"]), hide_index=True)
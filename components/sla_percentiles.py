@@ -0,0 +1,38 @@
+# components/sla_percentiles.py
+import streamlit as st
+from data.sketches import merge_window, window_bounds, percentile_table, SLA_METRICS
+
+
+def render_sla_percentiles(day_sketches, selected_date, product_selected, upload_type):
+    """Render per-day sketches (sla_day_sketches) merged over the SLA windows, with the sidebar filters."""
+    st.subheader("SLA Percentiles")
+    if not day_sketches or selected_date is None:
+        st.info("No SLA data available.")
+        return
+
+    tabs = st.tabs([label for label, _, _ in window_bounds(selected_date)])
+    for tab, (label, start, end) in zip(tabs, window_bounds(selected_date)):
+        merged = {
+            key: sk for key, sk in merge_window(day_sketches, start, end).items()
+            if (not product_selected or key[0] in product_selected)
+            and (not upload_type or key[1] == upload_type)
+        }
+
+        with tab:
+            if not merged:
+                st.info(f"No completed visits for {label.lower()}.")
+                continue
+            # headline tiles: merge the selected groups' sketches per metric
+            cols = st.columns(len(SLA_METRICS))
+            for col, metric in zip(cols, SLA_METRICS):
+                overall = None
+                for (_, _, m), sk in merged.items():
+                    if m == metric:
+                        overall = sk.copy() if overall is None else overall.merge(sk)
+                p90 = overall.quantile(0.9) if overall is not None else None
+                col.metric(f"{metric} p90", "-" if p90 is None else f"{p90:.1f}")
+            table = percentile_table(merged)
+            st.dataframe(
+                table.sort_values(["Metric", "Product_Group", "Direction"]).reset_index(drop=True),
+                hide_index=True
+            )
@@ -0,0 +1,105 @@
+# components/waiting_board.py
+import html
+import json
+
+import pandas as pd
+import streamlit.components.v1 as components
+
+from config.config import ALERT_WAIT_THRESHOLDS
+from data.alerts import match_rule
+from utils.time_utils import epoch_to_local, now_epoch_ns
+
+WARN_RATIO = 0.75       # amber from 75% of the truck's waiting threshold, red past it
+_ROW_PX = 34
+
+_TEMPLATE = """
+<style>
+  table {{ border-collapse: collapse; width: 100%; font-family: "Source Sans Pro", sans-serif; font-size: 14px; }}
+  th, td {{ padding: 6px 10px; border-bottom: 1px solid #e6e9ef; text-align: left; white-space: nowrap; }}
+  th {{ color: #555; font-weight: 600; position: sticky; top: 0; background: #fff; }}
+  td.min {{ text-align: right; font-variant-numeric: tabular-nums; font-weight: 600; }}
+  tr.warn td.min {{ color: #b26a00; }}
+  tr.late td.min {{ color: #d62728; }}
+  tr.late {{ background: #fdecea; }}
+</style>
+<table>
+  <thead><tr>{head}</tr></thead>
+  <tbody id="rows">{body}</tbody>
+</table>
+<script>
+  // server clock at render time; the browser only adds its own elapsed time, so a skewed
+  // client clock doesn't shift the minutes
+  const serverNow = {server_now_ms};
+  const frozen = {frozen};
+  const loadedAt = Date.now();
+  function tick() {{
+    const now = frozen ? serverNow : serverNow + (Date.now() - loadedAt);
+    const rows = Array.from(document.querySelectorAll("#rows tr"));
+    for (const tr of rows) {{
+      const minutes = (now - Number(tr.dataset.arrival)) / 60000;
+      const threshold = Number(tr.dataset.threshold);
+      tr.querySelector("td.min").textContent = minutes.toFixed(1);
+      tr.dataset.minutes = minutes;
+      tr.className = threshold && minutes >= threshold ? "late"
+                   : threshold && minutes >= threshold * {warn_ratio} ? "warn" : "";
+    }}
+    rows.sort((a, b) => Number(b.dataset.minutes) - Number(a.dataset.minutes))
+        .forEach(tr => tr.parentNode.appendChild(tr));
+  }}
+  tick();
+  if (!frozen) setInterval(tick, 1000);
+</script>
+"""
+
+_COLUMNS = [
+    ("Product_Group", "Product"),
+    ("Coming_to_Upload_or_Unload", "Direction"),
+    ("Truck_Plate_Number", "Truck"),
+    ("Arrival_Time", "Arrival"),
+    ("Waiting_min", "Waiting (min)"),
+    ("Threshold_min", "Threshold (min)"),
+    ("Driver_Name", "Driver"),
+    ("Phone_Number", "Phone"),
+]
+
+
+def _cell(value):
+    return "" if value is None or (not isinstance(value, str) and pd.isna(value)) else html.escape(str(value))
+
+
+def render_waiting_board(waiting, now_ns=None):
+    """
+    Waiting trucks as a small HTML component whose Waiting_min ticks in the browser
+    (threshold colouring from ALERT_WAIT_THRESHOLDS), so the elapsed minutes stay current
+    without server reruns. `now_ns` freezes the clock (as-of views).
+    """
+    frozen = now_ns is not None
+    now_ns = now_epoch_ns() if now_ns is None else now_ns
+    arrival_local = epoch_to_local(waiting["Arrival_Time"]).dt.strftime("%H:%M")
+
+    rows = []
+    for (_, r), arrival in zip(waiting.iterrows(), arrival_local):
+        rule = match_rule(r["Product_Group"], r["Coming_to_Upload_or_Unload"])
+        values = {**r.to_dict(), "Arrival_Time": arrival, "Waiting_min": "",
+                  "Threshold_min": "" if rule is None else ALERT_WAIT_THRESHOLDS[rule]}
+        cells = "".join(
+            f'<td class="min">{_cell(values[c])}</td>' if c == "Waiting_min" else f"<td>{_cell(values[c])}</td>"
+            for c, _ in _COLUMNS
+        )
+        rows.append(
+            f'<tr data-arrival="{int(r["Arrival_Time"]) // 10**6}" '
+            f'data-threshold="{values["Threshold_min"] or 0}">{cells}</tr>'
+        )
+
+    components.html(
+        _TEMPLATE.format(
+            head="".join(f"<th>{label}</th>" for _, label in _COLUMNS),
+            body="".join(rows),
+            server_now_ms=now_ns // 10**6,
+            frozen=json.dumps(frozen),
+            warn_ratio=WARN_RATIO,
+        ),
+        height=min(60 + _ROW_PX * len(rows), 600),
+        scrolling=True,
+    )
+
@@ -0,0 +1,37 @@
+# components/yard_activity.py
+import streamlit as st
+import plotly.graph_objects as go
+from plotly.subplots import make_subplots
+from data.timeseries import to_local
+
+# range label -> days ending at the selected date
+RANGES = {"Day": 1, "7 days": 7, "28 days": 28}
+
+
+def select_activity_range():
+    """Range picker shown above the chart; returns the number of days."""
+    label = st.radio("Range", list(RANGES), horizontal=True, key="activity_range")
+    return RANGES[label]
+
+
+def render_yard_activity(series):
+    """
+    Yard activity chart (under the section header) for the chosen range (data/timeseries.activity_series): trucks waiting,
+    arrivals per hour and the rolling median Waiting_min per Product_Group. The series are
+    already downsampled server side, so the chart payload doesn't grow with the range.
+    """
+    if series is None:
+        st.info("No activity data available.")
+        return
+
+    fig = make_subplots(rows=3, cols=1, shared_xaxes=True, vertical_spacing=0.06,
+                        subplot_titles=("Trucks waiting", "Arrivals per hour", "Median waiting (min)"))
+    t, v = series["waiting"]
+    fig.add_trace(go.Scatter(x=to_local(t), y=v, mode="lines", line_shape="hv", name="Waiting"), row=1, col=1)
+    t, v = series["arrivals"]
+    fig.add_trace(go.Bar(x=to_local(t), y=v, name="Arrivals/h"), row=2, col=1)
+    for product, (t, v) in sorted(series["median"].items()):
+        fig.add_trace(go.Scatter(x=to_local(t), y=v, mode="lines", name=str(product)), row=3, col=1)
+
+    fig.update_layout(height=650, margin=dict(l=10, r=10, t=40, b=10), legend=dict(orientation="h"))
+    st.plotly_chart(fig, use_container_width=True)
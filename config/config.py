@@ -1,5 +1,6 @@
 # config/config.py
 
+import json
 import os
 
 # Choose environment: "local" or "host"
@@ -28,3 +29,76 @@ if ENVIRONMENT == "local":
 else:
     LOCAL_TZ = CAMBODIA_TZ
     DEBUG_MODE = False
+
+# Site registry: one entry per warehouse, each with its own spreadsheet, sheet gids and timezone.
+# SITES_FILE may point to a JSON file of the same shape to replace the built-in registry.
+SITES = {
+    "main": {
+        "name": "Main warehouse",
+        "spreadsheet_id": SPREADSHEET_ID,
+        "sheet_gids": SHEET_GIDS,
+        "timezone": LOCAL_TZ,
+    },
+}
+SITES_FILE = os.getenv("SITES_FILE", "")
+if SITES_FILE:
+    with open(SITES_FILE, encoding="utf-8") as f:
+        SITES = json.load(f)
+DEFAULT_SITE = os.getenv("DEFAULT_SITE", next(iter(SITES)))
+
+# Optional push ingestion endpoint (see data/ingest.py)
+INGEST_ENABLED = os.getenv("INGEST_ENABLED", "0") == "1"
+INGEST_HOST = os.getenv("INGEST_HOST", "127.0.0.1")
+INGEST_PORT = int(os.getenv("INGEST_PORT", 8765))
+INGEST_TOKEN = os.getenv("INGEST_TOKEN", "")          # shared secret, empty = no check
+INGEST_RETENTION_SECONDS = int(os.getenv("INGEST_RETENTION_SECONDS", 600))  # drop pushed rows the export never confirms
+
+# Historical backfill (see data/backfill.py)
+BACKFILL_STORE_DIR = os.getenv("BACKFILL_STORE_DIR", "backfill_store")
+KPI_DEFINITION_VERSION = 2          # bump when compute_per_truck_metrics changes -> backfill recomputes all
+
+# KPI dataframe engine: "pandas" (reference) or "polars" (optional dependency, multi-threaded/lazy)
+KPI_ENGINE = os.getenv("KPI_ENGINE", "pandas")
+
+# Optional embedded SQLite event store (see data/store.py)
+EVENT_STORE_ENABLED = os.getenv("EVENT_STORE_ENABLED", "0") == "1"
+EVENT_STORE_PATH = os.getenv("EVENT_STORE_PATH", "events.sqlite3")
+
+# Adaptive per-sheet polling (see data/loader.py): (min, max) seconds between fetches.
+# Intervals shrink when a sheet changes, grow while it doesn't, and back off on errors/throttling.
+POLL_BOUNDS = {
+    'security': (10, 60),
+    'status': (10, 60),
+    'driver': (30, 600),
+    'logistic': (30, 600),
+}
+YARD_HOURS = (6, 20)                 # local hours [start, end) with yard activity
+POLL_IDLE_MAX_SECONDS = 900          # max interval outside YARD_HOURS
+POLL_ERROR_MAX_SECONDS = 600         # max back-off after upstream errors
+
+# Headless long-wait alerts (see data/alerts.py, alert_worker.py)
+# Waiting threshold in minutes per (Product_Group, direction); "*" matches anything, most specific wins.
+ALERT_WAIT_THRESHOLDS = {
+    ("*", "*"): 60,
+}
+ALERT_MAX_AGE_HOURS = 12             # ignore arrivals older than this (never started / bad data)
+ALERT_SINKS = os.getenv("ALERT_SINKS", "log,stdout").split(",")
+ALERT_LOG_PATH = os.getenv("ALERT_LOG_PATH", "alerts.log")
+ALERT_WEBHOOK_URL = os.getenv("ALERT_WEBHOOK_URL", "")
+ALERT_STATE_PATH = os.getenv("ALERT_STATE_PATH", "alerts_state.json")
+ALERT_POLL_SECONDS = int(os.getenv("ALERT_POLL_SECONDS", 30))
+
+# As-of (time travel) views (see data/asof.py): per-truck state checkpoint spacing within a day
+ASOF_CHECKPOINT_MINUTES = int(os.getenv("ASOF_CHECKPOINT_MINUTES", 15))
+
+# Yard activity charts (see data/timeseries.py): points per series sent to the browser, base bucket
+CHART_POINT_BUDGET = int(os.getenv("CHART_POINT_BUDGET", 500))
+CHART_BUCKET_MINUTES = 5
+
+# Shared snapshots for multi-process deployments (see data/shared_snapshot.py, snapshot_worker.py).
+# Empty = every app process fetches the sheets itself. Needs pyarrow.
+SHARED_SNAPSHOT_DIR = os.getenv("SHARED_SNAPSHOT_DIR", "")
+SHARED_SNAPSHOT_KEEP = 3            # published versions kept on disk (replicas may still map older ones)
+SNAPSHOT_WORKER_SECONDS = int(os.getenv("SNAPSHOT_WORKER_SECONDS", 5))   # tick; fetches follow POLL_BOUNDS
+# a pointer the worker hasn't confirmed for this long means it stalled -> replicas fetch themselves
+SHARED_SNAPSHOT_MAX_AGE_SECONDS = int(os.getenv("SHARED_SNAPSHOT_MAX_AGE_SECONDS", 120))
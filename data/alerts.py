@@ -0,0 +1,156 @@
+# data/alerts.py
+"""
+Long-wait alert evaluation off the status event stream (no UI session needed).
+
+Open arrivals live in one min-heap per threshold rule, ordered by Arrival_Time, so each
+event costs O(log n): Arrival pushes, Start_Loading/Completed marks the visit closed
+(removed lazily when it reaches the top). evaluate(now) pops only the heads whose
+Arrival_Time + threshold has passed. Each (plate, arrival, rule) fires at most once,
+and fired keys are persisted so a restarted worker doesn't repeat them.
+"""
+import heapq
+import json
+import logging
+import os
+import urllib.request
+
+import pandas as pd
+
+from config.config import (
+    ALERT_WAIT_THRESHOLDS, ALERT_MAX_AGE_HOURS, ALERT_SINKS,
+    ALERT_LOG_PATH, ALERT_WEBHOOK_URL, ALERT_STATE_PATH,
+)
+from utils.time_utils import epoch_to_local, NS_PER_MIN
+
+logger = logging.getLogger(__name__)
+
+
+def match_rule(product, direction, thresholds=ALERT_WAIT_THRESHOLDS):
+    """Most specific (product, direction) rule key for a visit, or None."""
+    for key in ((product, direction), (product, "*"), ("*", direction), ("*", "*")):
+        if key in thresholds:
+            return key
+    return None
+
+
+class LongWaitEvaluator:
+
+    def __init__(self, thresholds=ALERT_WAIT_THRESHOLDS, fired=None):
+        self.thresholds = thresholds
+        self.heaps = {key: [] for key in thresholds}   # rule -> [(arrival_ns, plate)]
+        self.open = {}                                 # plate -> (arrival_ns, rule)
+        self.fired = set(fired or ())                  # "plate|arrival_ns|rule_product|rule_direction"
+
+    def on_event(self, plate, status, ts, product=None, direction=None):
+        if status == "Arrival":
+            # a repeated scan of an open visit is ignored; an Arrival past ALERT_MAX_AGE_HOURS
+            # after the open one is a new visit (the old one never got a Start_Loading)
+            if plate in self.open and ts - self.open[plate][0] <= ALERT_MAX_AGE_HOURS * 60 * NS_PER_MIN:
+                return
+            rule = match_rule(product, direction, self.thresholds)
+            if rule is None:
+                return
+            self.open[plate] = (ts, rule)
+            heapq.heappush(self.heaps[rule], (ts, plate))
+        elif status in ("Start_Loading", "Completed"):
+            self.open.pop(plate, None)
+
+    def evaluate(self, now_ns):
+        """Yield alert dicts for open arrivals whose waiting time crossed their rule's threshold."""
+        max_age_ns = ALERT_MAX_AGE_HOURS * 60 * NS_PER_MIN
+        for rule, heap in self.heaps.items():
+            deadline = self.thresholds[rule] * NS_PER_MIN
+            while heap and heap[0][0] + deadline <= now_ns:
+                arrival_ns, plate = heapq.heappop(heap)
+                if self.open.get(plate, (None,))[0] != arrival_ns:
+                    continue   # started/completed meanwhile, or superseded
+                # stays in self.open until Start_Loading/Completed, so repeated Arrival scans don't re-alert
+                if now_ns - arrival_ns > max_age_ns:
+                    # stale visit (never started): drop it so the plate's next Arrival counts
+                    del self.open[plate]
+                    continue
+                key = f"{plate}|{arrival_ns}|{rule[0]}|{rule[1]}"
+                if key in self.fired:
+                    continue
+                self.fired.add(key)
+                yield {
+                    "key": key,
+                    "plate": plate,
+                    "rule": list(rule),
+                    "threshold_min": self.thresholds[rule],
+                    "arrival_time": epoch_to_local(pd.Series([arrival_ns])).iloc[0].isoformat(),
+                    "waiting_min": round((now_ns - arrival_ns) / NS_PER_MIN, 1),
+                }
+
+
+# ---------------- sinks ----------------
+
+class LogFileSink:
+    def __init__(self, path=ALERT_LOG_PATH):
+        self.path = path
+
+    def send(self, alert):
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(alert, ensure_ascii=False) + "\n")
+
+
+class WebhookSink:
+    def __init__(self, url=ALERT_WEBHOOK_URL):
+        self.url = url
+
+    def send(self, alert):
+        req = urllib.request.Request(
+            self.url, data=json.dumps(alert).encode("utf-8"),
+            headers={"Content-Type": "application/json"}, method="POST",
+        )
+        urllib.request.urlopen(req, timeout=10).close()
+
+
+class StdoutSink:
+    """Local stand-in for real notification channels."""
+    def send(self, alert):
+        print(f"[ALERT] {alert['plate']} waiting {alert['waiting_min']} min "
+              f"(>{alert['threshold_min']} min, rule {alert['rule']}) since {alert['arrival_time']}")
+
+
+def build_sinks(names=ALERT_SINKS):
+    sinks = []
+    for name in (n.strip() for n in names):
+        if name == "log":
+            sinks.append(LogFileSink())
+        elif name == "webhook" and ALERT_WEBHOOK_URL:
+            sinks.append(WebhookSink())
+        elif name == "stdout":
+            sinks.append(StdoutSink())
+    return sinks
+
+
+def dispatch(alert, sinks):
+    for sink in sinks:
+        try:
+            sink.send(alert)
+        except Exception:
+            # one failing sink must not block the others
+            logger.exception("alert sink %s failed", type(sink).__name__)
+
+
+# ---------------- fired-key persistence ----------------
+
+def load_fired(path=ALERT_STATE_PATH):
+    if os.path.exists(path):
+        with open(path, encoding="utf-8") as f:
+            return set(json.load(f))
+    return set()
+
+
+def prune_fired(fired, now_ns):
+    """Drop keys whose arrival is too old to ever be evaluated again."""
+    horizon = now_ns - 2 * ALERT_MAX_AGE_HOURS * 60 * NS_PER_MIN
+    return {k for k in fired if int(k.split("|")[1]) >= horizon}
+
+
+def save_fired(fired, path=ALERT_STATE_PATH):
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(sorted(fired), f)
+    os.replace(tmp, path)
@@ -0,0 +1,214 @@
+# data/asof.py
+"""
+As-of (time travel) views: the dashboard exactly as it looked at a past instant.
+
+The as-of view of a snapshot is every cleaned row with Timestamp <= as_of (rows without a
+Timestamp can't be placed in time and are left out). Cutting the frames is cheap; the
+per-truck KPI fold is not, so AsOfIndex keeps per-truck state checkpoints:
+
+    base          state after every event up to local midnight of the selected day
+    checkpoints   every ASOF_CHECKPOINT_MINUTES through the day, holding only the
+                  trucks touched since midnight (an overlay on the base)
+
+An as-of query copies the nearest earlier checkpoint and replays the few events after it.
+The per-truck state is order independent (min times, earliest-row product, the row-ordered
+Completed list), so the answer equals compute_per_truck_metrics() on the cut frames.
+
+AsOfView plugs into compute_per_truck_metrics(engine=view) like any data/engines.py engine.
+"""
+import math
+from datetime import timedelta
+
+import numpy as np
+import pandas as pd
+
+from config.config import ASOF_CHECKPOINT_MINUTES
+from data.snapshot import memoize_stage, stage_key
+from utils.time_utils import local_day_start_ns, epoch_local_date, NS_PER_MIN
+
+PLATE = "Truck_Plate_Number"
+SHEETS = ("security", "driver", "status", "logistic")
+
+# per-truck state: (arrival, start, status_product_row, status_product,
+#                   logistic_product_row, logistic_product, ((row, completed_ts), ...))
+_EMPTY = (None, None, None, None, None, None, ())
+
+
+def _apply(state, sheet, status, row, product, ts):
+    arrival, start, ps_row, ps, pl_row, pl, completed = state
+    if sheet == "status":
+        if status == "Arrival" and (arrival is None or ts < arrival):
+            arrival = ts
+        elif status == "Start_Loading" and (start is None or ts < start):
+            start = ts
+        elif status == "Completed":
+            completed = completed + ((row, ts),)
+        if product is not None and (ps_row is None or row < ps_row):
+            ps_row, ps = row, product
+    elif sheet == "logistic" and product is not None and (pl_row is None or row < pl_row):
+        pl_row, pl = row, product
+    return (arrival, start, ps_row, ps, pl_row, pl, completed)
+
+
+def _fold(target, events, base=None):
+    """Apply events (plate, sheet, status, row, product, ts) to `target`, falling back to `base`."""
+    for plate, sheet, status, row, product, ts in events:
+        state = target.get(plate)
+        if state is None:
+            state = base.get(plate, _EMPTY) if base is not None else _EMPTY
+        target[plate] = _apply(state, sheet, status, row, product, ts)
+
+
+def _completed_time(start, completed):
+    # same rule as the per-truck core: first Completed (sheet order) at/after Start_Loading,
+    # else the last one; without a start, the first one
+    if not completed:
+        return None
+    ordered = sorted(completed)
+    if start is None:
+        return ordered[0][1]
+    later = [ts for _, ts in ordered if ts >= start]
+    return later[0] if later else ordered[-1][1]
+
+
+def _core_frame(states):
+    """Per-truck core frame (data/engines.py shape and dtypes) from per-truck states."""
+    plates = sorted(states)
+    arrival, start, product, completed = [], [], [], []
+    for plate in plates:
+        a, s, _, ps, _, pl, comp = states[plate]
+        arrival.append(a)
+        start.append(s)
+        product.append(ps if ps is not None else (pl if pl is not None else np.nan))
+        completed.append(_completed_time(s, comp))
+
+    kpi = pd.DataFrame({
+        PLATE: pd.Series(plates),
+        "Arrival_Time": pd.array(arrival, dtype="Int64"),
+        "Start_Loading_Time": pd.array(start, dtype="Int64"),
+        "Product_Group": pd.Series(product),
+        "Completed_Time": pd.array(completed, dtype="Int64"),
+    })
+
+    def td_min(a, b):
+        return ((kpi[b] - kpi[a]) / NS_PER_MIN).to_numpy(dtype="float64", na_value=np.nan)
+
+    kpi["Waiting_min"] = td_min("Arrival_Time", "Start_Loading_Time")
+    kpi["Loading_min"] = td_min("Start_Loading_Time", "Completed_Time")
+    kpi["Total_min"] = td_min("Arrival_Time", "Completed_Time")
+    kpi["Date"] = epoch_local_date(kpi["Arrival_Time"])
+
+    flag = pd.Series("", index=kpi.index, dtype=object)
+    for col, label in (("Arrival_Time", "Missing_Arrival"), ("Start_Loading_Time", "Missing_Start"),
+                       ("Completed_Time", "Missing_Completed")):
+        missing = kpi[col].isna().to_numpy()
+        flag[missing] = flag[missing].map(lambda f, label=label: f"{f};{label}" if f else label)
+    kpi["Data_Quality_Flag"] = flag.replace("", "OK").infer_objects()
+    return kpi
+
+
+def _events(dfs):
+    """All timed rows of the four sheets as (plate, sheet, status, row, product, ts), sorted by ts."""
+    cols = {k: [] for k in ("ts", "plate", "sheet", "status", "row", "product")}
+    for sheet in SHEETS:
+        df = dfs.get(sheet)
+        if df is None or df.empty or "Timestamp" not in df.columns or PLATE not in df.columns:
+            continue
+        keep = (df["Timestamp"].notna() & df[PLATE].notna()).to_numpy()
+        n = int(keep.sum())
+
+        def values(col):
+            if col not in df.columns:
+                return np.full(n, None, dtype=object)
+            s = df[col][keep]
+            return s.astype(object).where(s.notna(), None).to_numpy()
+
+        cols["ts"].append(df["Timestamp"][keep].to_numpy(dtype="int64"))
+        cols["plate"].append(df[PLATE][keep].to_numpy(dtype=object))
+        cols["sheet"].append(np.full(n, sheet, dtype=object))
+        cols["status"].append(values("Status"))
+        cols["row"].append(np.arange(len(df))[keep])
+        cols["product"].append(values("Product_Group") if sheet in ("status", "logistic") else np.full(n, None, dtype=object))
+
+    if not cols["ts"]:
+        return np.array([], dtype="int64"), []
+    arrays = {k: np.concatenate(v) for k, v in cols.items()}
+    order = np.argsort(arrays["ts"], kind="stable")
+    ts = arrays["ts"][order]
+    events = list(zip(*(arrays[k][order].tolist() for k in ("plate", "sheet", "status", "row", "product", "ts"))))
+    return ts, events
+
+
+class AsOfIndex:
+
+    def __init__(self, dfs, day, step_minutes=ASOF_CHECKPOINT_MINUTES):
+        self.dfs = dfs
+        self.day_start = local_day_start_ns(day)
+        self.step = step_minutes * NS_PER_MIN
+        day_end = local_day_start_ns(day + timedelta(days=1))
+        self._ts, self._events = _events(dfs)
+
+        split = int(self._ts.searchsorted(self.day_start, side="right"))
+        self._base = {}
+        _fold(self._base, self._events[:split])
+        self._base_frame = _core_frame(self._base)
+
+        # checkpoint k: overlay after every event with ts <= day_start + k * step
+        self._checkpoints = [({}, split)]
+        overlay, pos = {}, split
+        for k in range(1, math.ceil((day_end - self.day_start) / self.step) + 1):
+            end = int(self._ts.searchsorted(self.day_start + k * self.step, side="right"))
+            _fold(overlay, self._events[pos:end], self._base)
+            self._checkpoints.append((dict(overlay), end))
+            pos = end
+
+    def frames(self, as_of):
+        """The cleaned frames as they were at `as_of` (rows with Timestamp <= as_of, sheet order kept)."""
+        out = {}
+        for name, df in self.dfs.items():
+            if "Timestamp" in df.columns:
+                df = df[df["Timestamp"].le(as_of).fillna(False).to_numpy(dtype=bool)]
+            out[name] = df
+        return out
+
+    def per_truck_core(self, as_of):
+        """Per-truck core frame at `as_of`: nearest checkpoint + replay of the events after it."""
+        end = int(self._ts.searchsorted(as_of, side="right"))
+        if as_of < self.day_start:
+            # before the checkpointed day: fold from scratch (not a slider position)
+            states = {}
+            _fold(states, self._events[:end])
+            return _core_frame(states)
+
+        k = min((as_of - self.day_start) // self.step, len(self._checkpoints) - 1)
+        checkpoint, pos = self._checkpoints[k]
+        overlay = dict(checkpoint)
+        _fold(overlay, self._events[pos:max(pos, end)], self._base)
+
+        base = self._base_frame[~self._base_frame[PLATE].isin(list(overlay))]
+        # an empty part would turn the str columns of the other into object
+        parts = [f for f in (base, _core_frame(overlay)) if len(f)] or [base]
+        kpi = pd.concat(parts, ignore_index=True)
+        return kpi.sort_values(PLATE, kind="stable").reset_index(drop=True)
+
+    def view(self, as_of):
+        return AsOfView(self, int(as_of))
+
+
+class AsOfView:
+    """Engine-compatible as-of view: compute_per_truck_metrics(view.dfs..., engine=view)."""
+
+    def __init__(self, index, as_of):
+        self.index = index
+        self.as_of = as_of
+        self.name = f"asof@{as_of}"
+        self.dfs = index.frames(as_of)
+
+    def per_truck_core(self, df_security, df_status, df_logistic, df_driver):
+        return self.index.per_truck_core(self.as_of)
+
+
+def get_asof_index(dfs, manifest, day):
+    """AsOfIndex for `day`, built once per snapshot (memoized on the manifest)."""
+    return memoize_stage("asof_index", stage_key(manifest, extra=(day, ASOF_CHECKPOINT_MINUTES)),
+                         lambda: AsOfIndex(dfs, day))
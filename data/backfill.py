@@ -0,0 +1,194 @@
+# data/backfill.py
+"""
+Parallel backfill / recomputation of historical KPIs.
+
+Splits history into per-day (or per-week) partitions, computes per-truck KPIs and the
+daily-performance rollup for each partition in a process pool, and writes them to
+BACKFILL_STORE_DIR:
+
+    <store>/kpi/<partition>.csv
+    <store>/rollup/<partition>.csv
+    <store>/_progress.json      # finished partitions + their input fingerprints + KPI_DEFINITION_VERSION
+
+KPI time columns are written as UTC epoch ns, like the in-memory engine.
+
+Re-running resumes: a partition is skipped when it was finished for the current
+KPI_DEFINITION_VERSION from the same input rows (row counts + row hashes of its slice), so
+days that got new or corrected rows are recomputed (use --force to redo everything). Bump
+KPI_DEFINITION_VERSION in config/config.py whenever compute_per_truck_metrics changes to
+recompute everything.
+
+    python -m data.backfill --source sheets
+    python -m data.backfill --source sheets --site <site>      # store: <BACKFILL_STORE_DIR>.<site>
+    python -m data.backfill --source /path/to/export_dir --partition week --workers 8
+"""
+import argparse
+import hashlib
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import timedelta
+
+import pandas as pd
+
+from config.config import BACKFILL_STORE_DIR, KPI_DEFINITION_VERSION, SITES, DEFAULT_SITE
+from data.processor import clean_sheet_dfs
+from data.metrics import (
+    compute_per_truck_metrics, compute_daily_performance, compute_truck_dimension,
+    first_arrival_dates, plate_history,
+)
+from utils.time_utils import set_active_tz
+
+SHEETS = ("security", "driver", "status", "logistic")
+
+
+def load_source(source, site=DEFAULT_SITE):
+    """Raw sheets of `site` from its live spreadsheet ("sheets") or a directory of <sheet>.csv exports."""
+    if source == "sheets":
+        from data.loader import load_snapshot
+        raw_dfs, _ = load_snapshot(site, ingest=False)
+        return raw_dfs
+    return {name: pd.read_csv(os.path.join(source, f"{name}.csv")) for name in SHEETS}
+
+
+def partition_bounds(dates, partition="day"):
+    """[(partition_id, start_date, end_date)] covering every date in `dates`."""
+    starts = set()
+    for d in dates:
+        starts.add(d - timedelta(days=d.weekday()) if partition == "week" else d)
+    span = 6 if partition == "week" else 0
+    return [(s.isoformat(), s, s + timedelta(days=span)) for s in sorted(starts)]
+
+
+def slice_partition(dfs, first_arrival, start, end):
+    """
+    Full history of the plates whose first Arrival falls in [start, end] (`first_arrival`:
+    first_arrival_dates of the status sheet): the rows behind the dashboard's KPI rows for
+    those days. A returning plate's later arrivals belong to its first day, as on the dashboard.
+    """
+    return plate_history(dfs, first_arrival.index[(first_arrival >= start) & (first_arrival <= end)])
+
+
+def partition_fingerprint(part_dfs):
+    """Row count + hash of a partition's input slice: its KPIs change only when this does."""
+    h = hashlib.sha1()
+    rows = 0
+    for name in SHEETS:
+        df = part_dfs[name]
+        rows += len(df)
+        h.update(f"{name}|{len(df)}|{'|'.join(map(str, df.columns))}".encode("utf-8"))
+        h.update(pd.util.hash_pandas_object(df, index=False).to_numpy().tobytes())
+    return {"rows": rows, "hash": h.hexdigest()}
+
+
+def compute_partition(partition_id, start, end, part_dfs, tz_name):
+    """Worker: per-truck KPIs for visits arriving in [start, end] and their daily rollup."""
+    # pool processes don't inherit the caller's active timezone (local dates)
+    set_active_tz(tz_name)
+    kpi = compute_per_truck_metrics(
+        part_dfs['security'], part_dfs['status'], part_dfs['logistic'], part_dfs['driver']
+    )
+    kpi = kpi[(kpi["Date"] >= start) & (kpi["Date"] <= end)]
+
+    trucks = compute_truck_dimension(part_dfs)
+    rollups = []
+    for day, day_kpi in kpi.groupby("Date"):
+        agg = compute_daily_performance(day_kpi, trucks)
+        agg.insert(0, "Date", day)
+        rollups.append(agg)
+    rollup = pd.concat(rollups, ignore_index=True) if rollups else pd.DataFrame()
+    return partition_id, kpi, rollup
+
+
+def _atomic_write_csv(df, path):
+    tmp = path + ".tmp"
+    df.to_csv(tmp, index=False)
+    os.replace(tmp, path)
+
+
+def _load_progress(store):
+    path = os.path.join(store, "_progress.json")
+    if os.path.exists(path):
+        with open(path, encoding="utf-8") as f:
+            progress = json.load(f)
+        # progress without per-partition fingerprints (a list) is recomputed
+        if progress.get("kpi_definition_version") == KPI_DEFINITION_VERSION and isinstance(progress["done"], dict):
+            return progress
+    return {"kpi_definition_version": KPI_DEFINITION_VERSION, "done": {}}
+
+
+def _save_progress(store, progress):
+    path = os.path.join(store, "_progress.json")
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(progress, f, indent=1)
+    os.replace(tmp, path)
+
+
+def run_backfill(raw_dfs, store=BACKFILL_STORE_DIR, partition="day", workers=None,
+                 start=None, end=None, force=False, log=print, site=DEFAULT_SITE):
+    """Clean once (in `site`'s timezone), split into partitions and fan them out over a process pool."""
+    tz_name = SITES[site]["timezone"]
+    set_active_tz(tz_name)
+    os.makedirs(os.path.join(store, "kpi"), exist_ok=True)
+    os.makedirs(os.path.join(store, "rollup"), exist_ok=True)
+
+    dfs = clean_sheet_dfs(raw_dfs)
+    first_arrival = first_arrival_dates(dfs['status'])
+    dates = set(first_arrival)
+    if start is not None:
+        dates = {d for d in dates if d >= start}
+    if end is not None:
+        dates = {d for d in dates if d <= end}
+
+    progress = _load_progress(store)
+    done = {} if force else progress["done"]
+    bounds = partition_bounds(dates, partition)
+    todo = []
+    for pid, s, e in bounds:
+        part_dfs = slice_partition(dfs, first_arrival, s, e)
+        fingerprint = partition_fingerprint(part_dfs)
+        if done.get(pid) != fingerprint:
+            todo.append((pid, s, e, part_dfs, fingerprint))
+    log(f"{len(todo)} partition(s) to compute, {len(bounds) - len(todo)} already done")
+
+    fingerprints = {pid: fingerprint for pid, _, _, _, fingerprint in todo}
+    with ProcessPoolExecutor(max_workers=workers or os.cpu_count()) as pool:
+        futures = [
+            pool.submit(compute_partition, pid, s, e, part_dfs, tz_name)
+            for pid, s, e, part_dfs, _ in todo
+        ]
+        for fut in as_completed(futures):
+            pid, kpi, rollup = fut.result()
+            _atomic_write_csv(kpi, os.path.join(store, "kpi", f"{pid}.csv"))
+            _atomic_write_csv(rollup, os.path.join(store, "rollup", f"{pid}.csv"))
+            done[pid] = fingerprints[pid]
+            progress["done"] = dict(sorted(done.items()))
+            _save_progress(store, progress)
+            log(f"  {pid}: {len(kpi)} truck(s)")
+    return progress
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Parallel KPI backfill")
+    parser.add_argument("--source", default="sheets", help='"sheets" or a directory with <sheet>.csv files')
+    parser.add_argument("--site", choices=sorted(SITES), default=DEFAULT_SITE)
+    parser.add_argument("--store", default=None, help="default: BACKFILL_STORE_DIR (<dir>.<site> for other sites)")
+    parser.add_argument("--partition", choices=["day", "week"], default="day")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--start", type=lambda s: pd.to_datetime(s).date(), default=None)
+    parser.add_argument("--end", type=lambda s: pd.to_datetime(s).date(), default=None)
+    parser.add_argument("--force", action="store_true", help="recompute partitions already done")
+    args = parser.parse_args(argv)
+
+    store = args.store or (BACKFILL_STORE_DIR if args.site == DEFAULT_SITE else f"{BACKFILL_STORE_DIR}.{args.site}")
+    run_backfill(
+        load_source(args.source, args.site), store=store, partition=args.partition,
+        workers=args.workers, start=args.start, end=args.end, force=args.force, site=args.site
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
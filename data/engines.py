@@ -0,0 +1,210 @@
+# data/engines.py
+"""
+Dataframe engines for the per-truck KPI core (compute_per_truck_metrics before filters).
+
+    pandas  reference implementation (data/metrics._per_truck_core)
+    polars  Arrow-native, lazily evaluated and multi-threaded; optional dependency
+
+Selected by KPI_ENGINE in config/config.py (or the `engine=` argument). Both return the
+same pandas frame: one row per truck, event times as Int64 UTC epoch ns.
+
+    python -m data.engines --trucks 200000      # benchmark + equality check
+"""
+import argparse
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from config.config import KPI_ENGINE, LOCAL_TZ
+from utils.time_utils import active_tz
+
+PLATE = "Truck_Plate_Number"
+_NULL_NS = np.iinfo("int64").min     # sentinel for nulls when leaving polars without pyarrow
+
+
+class PandasEngine:
+    name = "pandas"
+
+    def per_truck_core(self, df_security, df_status, df_logistic, df_driver):
+        from data.metrics import _per_truck_core
+        return _per_truck_core(df_security, df_status, df_logistic, df_driver)
+
+
+class PolarsEngine:
+    name = "polars"
+
+    def __init__(self):
+        import polars as pl
+        self.pl = pl
+
+    def _frame(self, df, cols):
+        """pandas -> polars LazyFrame via plain numpy arrays (no pyarrow needed)."""
+        pl = self.pl
+        data = {}
+        for c in cols:
+            if c == "Timestamp":
+                ts = df[c].to_numpy(dtype="int64", na_value=_NULL_NS) if c in df.columns else np.full(len(df), _NULL_NS)
+                data[c] = pl.Series(c, ts, dtype=pl.Int64)
+            elif c in df.columns:
+                # as a list: polars rejects object arrays that start with a null
+                data[c] = pl.Series(c, df[c].to_numpy(dtype=object, na_value=None).tolist(), dtype=pl.Utf8, strict=False)
+            else:
+                data[c] = pl.Series(c, [None] * len(df), dtype=pl.Utf8)
+        out = pl.DataFrame(data).lazy()
+        if "Timestamp" in cols:
+            out = out.with_columns(pl.when(pl.col("Timestamp") == _NULL_NS).then(None)
+                                   .otherwise(pl.col("Timestamp")).alias("Timestamp"))
+        return out
+
+    def per_truck_core(self, df_security, df_status, df_logistic, df_driver):
+        pl = self.pl
+        status = self._frame(df_status, [PLATE, "Status", "Timestamp", "Product_Group"]).with_row_index("_row")
+        status = status.filter(pl.col(PLATE).is_not_null())
+        logistic = self._frame(df_logistic, [PLATE, "Product_Group"]).with_row_index("_row")
+
+        arrival = (status.filter(pl.col("Status") == "Arrival")
+                   .group_by(PLATE).agg(pl.col("Timestamp").min().alias("Arrival_Time")))
+        start = (status.filter(pl.col("Status") == "Start_Loading")
+                 .group_by(PLATE).agg(pl.col("Timestamp").min().alias("Start_Loading_Time")))
+
+        def first_product(lf):
+            return (lf.filter(pl.col(PLATE).is_not_null() & pl.col("Product_Group").is_not_null())
+                    .sort("_row").group_by(PLATE).agg(pl.col("Product_Group").first()))
+
+        # first Completed at/after Start_Loading, else the last one; no start -> the first one
+        completed = (status.filter((pl.col("Status") == "Completed") & pl.col("Timestamp").is_not_null())
+                     .sort("_row")
+                     .join(start, on=PLATE, how="left")
+                     .group_by(PLATE, maintain_order=True)
+                     .agg(
+                         pl.col("Timestamp").first().alias("_first"),
+                         pl.col("Timestamp").last().alias("_last"),
+                         pl.col("Timestamp").filter(pl.col("Timestamp") >= pl.col("Start_Loading_Time")).first().alias("_later"),
+                         pl.col("Start_Loading_Time").first().alias("_start"),
+                     )
+                     .select(PLATE, pl.when(pl.col("_start").is_null()).then(pl.col("_first"))
+                             .otherwise(pl.coalesce("_later", "_last")).alias("Completed_Time")))
+
+        trucks = pl.concat([
+            self._frame(df, [PLATE]).select(PLATE)
+            for df in (df_status, df_logistic, df_security, df_driver)
+        ]).filter(pl.col(PLATE).is_not_null()).unique().sort(PLATE)
+
+        def minutes(a, b):
+            return ((pl.col(b) - pl.col(a)).cast(pl.Float64) / 60e9)
+
+        flag = pl.concat_str([
+            pl.when(pl.col("Arrival_Time").is_null()).then(pl.lit("Missing_Arrival")),
+            pl.when(pl.col("Start_Loading_Time").is_null()).then(pl.lit("Missing_Start")),
+            pl.when(pl.col("Completed_Time").is_null()).then(pl.lit("Missing_Completed")),
+        ], separator=";", ignore_nulls=True)
+
+        kpi = (trucks
+               .join(arrival, on=PLATE, how="left")
+               .join(start, on=PLATE, how="left")
+               .join(first_product(status).join(first_product(logistic), on=PLATE, how="full", coalesce=True, suffix="_log")
+                     .select(PLATE, pl.coalesce("Product_Group", "Product_Group_log").alias("Product_Group")),
+                     on=PLATE, how="left")
+               .join(completed, on=PLATE, how="left")
+               .with_columns(
+                   minutes("Arrival_Time", "Start_Loading_Time").alias("Waiting_min"),
+                   minutes("Start_Loading_Time", "Completed_Time").alias("Loading_min"),
+                   minutes("Arrival_Time", "Completed_Time").alias("Total_min"),
+                   pl.from_epoch("Arrival_Time", time_unit="ns").dt.replace_time_zone("UTC")
+                     .dt.convert_time_zone(active_tz().zone).dt.date().alias("Date"),
+               )
+               .with_columns(pl.when(flag == "").then(pl.lit("OK")).otherwise(flag).alias("Data_Quality_Flag"))
+               .sort(PLATE)
+               .collect())
+
+        return self._to_pandas(kpi)
+
+    def _to_pandas(self, kpi):
+        """polars -> pandas column by column via numpy (no pyarrow needed)."""
+        out = {}
+        for c in kpi.columns:
+            col = kpi[c]
+            if c in ("Arrival_Time", "Start_Loading_Time", "Completed_Time"):
+                values = pd.array(col.fill_null(_NULL_NS).to_numpy(), dtype="Int64")
+                values[values == _NULL_NS] = pd.NA
+                out[c] = values
+            elif c == "Date":
+                out[c] = pd.Series(pd.to_datetime(col.to_numpy())).dt.date.to_numpy()
+            elif c in ("Waiting_min", "Loading_min", "Total_min"):
+                out[c] = col.to_numpy()
+            else:
+                out[c] = pd.Series(col.to_numpy(), dtype="str").to_numpy()
+        cols = [PLATE, "Arrival_Time", "Start_Loading_Time", "Product_Group", "Completed_Time",
+                "Waiting_min", "Loading_min", "Total_min", "Date", "Data_Quality_Flag"]
+        return pd.DataFrame({c: out[c] for c in cols})
+
+
+_ENGINES = {"pandas": PandasEngine, "polars": PolarsEngine}
+_instances = {}
+
+
+def get_engine(name=None):
+    """
+    Engine instance by name (default: KPI_ENGINE). Raises ImportError if polars is selected but missing.
+    An engine object (anything with per_truck_core, e.g. data/asof.AsOfView) is returned as is.
+    """
+    if hasattr(name, "per_truck_core"):
+        return name
+    name = name or KPI_ENGINE
+    if name not in _ENGINES:
+        raise ValueError(f"unknown KPI engine {name!r}; expected one of {sorted(_ENGINES)}")
+    if name not in _instances:
+        _instances[name] = _ENGINES[name]()
+    return _instances[name]
+
+
+def _synthetic_history(n_trucks, seed=0):
+    """Cleaned-shape frames with n_trucks visits spread over a year (benchmark only)."""
+    rng = np.random.default_rng(seed)
+    plates = np.array([f"T{i}" for i in range(n_trucks)], dtype=object)
+    products = rng.choice(["Pipe", "Coil", "Trading", "Roofing", "PU", "Other"], n_trucks).astype(object)
+    arrival = pd.Timestamp("2025-01-01", tz=LOCAL_TZ).value + rng.integers(0, 365 * 86400, n_trucks) * 10**9
+    start = arrival + rng.integers(60, 5400, n_trucks) * 10**9
+    done = start + rng.integers(300, 7200, n_trucks) * 10**9
+    has_start = rng.random(n_trucks) > 0.05
+    status = pd.DataFrame({
+        PLATE: np.concatenate([plates, plates[has_start], plates[has_start]]),
+        "Product_Group": np.concatenate([products, products[has_start], products[has_start]]),
+        "Status": ["Arrival"] * n_trucks + ["Start_Loading"] * int(has_start.sum()) + ["Completed"] * int(has_start.sum()),
+        "Timestamp": pd.array(np.concatenate([arrival, start[has_start], done[has_start]]), dtype="Int64"),
+    })
+    logistic = pd.DataFrame({PLATE: plates, "Product_Group": products,
+                             "Timestamp": pd.array(done, dtype="Int64")})
+    security = pd.DataFrame({PLATE: plates, "Coming_to_Upload_or_Unload": "Uploading",
+                             "Timestamp": pd.array(arrival, dtype="Int64")})
+    driver = pd.DataFrame({PLATE: plates, "Timestamp": pd.array(arrival, dtype="Int64")})
+    return security, status, logistic, driver
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark KPI engines on synthetic history")
+    parser.add_argument("--trucks", type=int, default=100000)
+    args = parser.parse_args(argv)
+
+    frames = _synthetic_history(args.trucks)
+    results = {}
+    for name in _ENGINES:
+        try:
+            engine = get_engine(name)
+        except ImportError:
+            print(f"{name:7s} not installed")
+            continue
+        t0 = time.perf_counter()
+        results[name] = engine.per_truck_core(*frames)
+        print(f"{name:7s} {time.perf_counter() - t0:8.2f}s  ({len(results[name])} trucks)")
+
+    if len(results) == 2:
+        pd.testing.assert_frame_equal(results["pandas"], results["polars"], check_dtype=False)
+        print("frames identical")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
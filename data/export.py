@@ -0,0 +1,163 @@
+# data/export.py
+"""
+Streaming export of KPI tables over arbitrary date ranges.
+
+Results are produced one day at a time through a generator pipeline
+(day frames -> KPI table chunk -> writer), so memory is bounded by one day's
+trucks no matter how long the range is.
+
+A day holds the visits the dashboard shows for it: one row per plate, folded over the
+plate's whole history and dated by its first Arrival (compute_per_truck_metrics). Both
+sources give a day the full history of its plates: FrameSource from the loaded sheets,
+the event store (--store) from its plate index. Formats: csv, jsonl, parquet (needs pyarrow).
+
+    python -m data.export --table loading_durations --start 2026-10-01 --end 2026-10-31 --format csv --out oct.csv
+    python -m data.export --table daily_performance --start 2026-10-01 --end 2026-10-31 --format parquet --out oct.parquet --store
+"""
+import argparse
+import sys
+from datetime import timedelta
+
+import pandas as pd
+
+from data.metrics import (
+    compute_per_truck_metrics, compute_loading_durations, compute_daily_performance,
+    compute_truck_dimension, first_arrival_dates, plate_history, KPI_TIME_COLS,
+)
+from utils.time_utils import epoch_to_local
+
+TABLES = ("loading_durations", "daily_performance")
+FORMATS = ("csv", "jsonl", "parquet")
+
+# Arrow column types per table: a Parquet file has one schema, and a day whose column is
+# all empty (no weights, no direction) would otherwise fix it to the `null` type
+PARQUET_TYPES = {
+    "loading_durations": {
+        "Product_Group": "string", "Truck_Plate_Number": "string", "Date": "string",
+        "Arrival_Time": "string", "Start_Loading_Time": "string", "Completed_Time": "string",
+        "Waiting_min": "double", "Loading_min": "double", "Total_min": "double",
+        "Total_Weight_MT": "double", "Loading_Rate": "double", "Mission": "string",
+    },
+    "daily_performance": {
+        "Date": "string", "Product_Group": "string", "Coming_to_load_or_Unload": "string",
+        "Total_truck": "int64", "Total_weight_MT": "double", "Total_min": "double",
+        "Loading_Rate": "double",
+    },
+}
+
+
+class FrameSource:
+    """
+    Day frames from in-memory cleaned frames: the full history of the plates whose first
+    Arrival is on the day (first_arrival_dates), i.e. exactly the rows behind that day's
+    dashboard KPI rows.
+    """
+
+    def __init__(self, dfs):
+        self.dfs = dfs
+        self.first_arrival = first_arrival_dates(dfs['status'])
+
+    def day_frames(self, day):
+        return plate_history(self.dfs, self.first_arrival.index[self.first_arrival == day])
+
+
+def iter_days(start, end):
+    day = start
+    while day <= end:
+        yield day
+        day += timedelta(days=1)
+
+
+def iter_table_chunks(source, table, start, end, product_filter=None, upload_type=None):
+    """Yield one DataFrame chunk per day in [start, end] for `table`."""
+    if table not in TABLES:
+        raise ValueError(f"unknown table {table!r}; expected one of {TABLES}")
+    for day in iter_days(start, end):
+        dfs = source.day_frames(day)
+        if dfs['status'].empty:
+            continue
+        kpi = compute_per_truck_metrics(
+            dfs['security'], dfs['status'], dfs['logistic'], dfs['driver'],
+            selected_date=day, product_filter=product_filter, upload_type=upload_type
+        )
+        if kpi.empty:
+            continue
+        trucks = compute_truck_dimension(dfs)
+        if table == "loading_durations":
+            chunk = compute_loading_durations(kpi, trucks)
+            for c in KPI_TIME_COLS:
+                chunk[c] = epoch_to_local(chunk[c]).astype(str).replace("NaT", "")
+        else:
+            chunk = compute_daily_performance(kpi, trucks)
+            chunk.insert(0, "Date", day)
+        chunk["Date"] = chunk["Date"].astype(str)
+        yield chunk.reset_index(drop=True)
+
+
+def write_chunks(chunks, fmt, out, table=None):
+    """
+    Write chunks to `out` (path or binary file object) incrementally. Returns rows written.
+    Parquet uses the PARQUET_TYPES schema of `table` (else the first chunk's schema).
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f"unknown format {fmt!r}; expected one of {FORMATS}")
+    own = isinstance(out, str)
+    f = open(out, "wb") if own else out
+    rows = 0
+    writer = None
+    try:
+        for chunk in chunks:
+            if fmt == "csv":
+                f.write(chunk.to_csv(index=False, header=(rows == 0)).encode("utf-8"))
+            elif fmt == "jsonl":
+                f.write(chunk.to_json(orient="records", lines=True, force_ascii=False).encode("utf-8"))
+            else:
+                import pyarrow as pa
+                import pyarrow.parquet as pq
+                if writer is None:
+                    if table in PARQUET_TYPES:
+                        schema = pa.schema([(c, pa.type_for_alias(t)) for c, t in PARQUET_TYPES[table].items()])
+                    else:
+                        schema = pa.Table.from_pandas(chunk, preserve_index=False).schema
+                    writer = pq.ParquetWriter(f, schema)
+                tbl = pa.Table.from_pandas(chunk[writer.schema.names], preserve_index=False)
+                writer.write_table(tbl.cast(writer.schema))
+            rows += len(chunk)
+    finally:
+        if writer is not None:
+            writer.close()
+        if own:
+            f.close()
+    return rows
+
+
+def export_table(source, table, start, end, fmt, out, product_filter=None, upload_type=None):
+    return write_chunks(iter_table_chunks(source, table, start, end, product_filter, upload_type), fmt, out, table)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Stream a KPI table for a date range to CSV/JSONL/Parquet")
+    parser.add_argument("--table", choices=TABLES, required=True)
+    parser.add_argument("--start", type=lambda s: pd.to_datetime(s).date(), required=True)
+    parser.add_argument("--end", type=lambda s: pd.to_datetime(s).date(), required=True)
+    parser.add_argument("--format", choices=FORMATS, default="csv")
+    parser.add_argument("--out", required=True)
+    parser.add_argument("--store", action="store_true", help="read days from the SQLite event store instead of the sheets")
+    args = parser.parse_args(argv)
+
+    if args.store:
+        from data.store import get_event_store
+        source = get_event_store()
+    else:
+        from data.loader import load_snapshot
+        from data.processor import clean_sheet_dfs
+        raw_dfs, _ = load_snapshot(ingest=False)
+        source = FrameSource(clean_sheet_dfs(raw_dfs))
+
+    rows = export_table(source, args.table, args.start, args.end, args.format, args.out)
+    print(f"wrote {rows} row(s) to {args.out}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,60 @@
+# data/filters.py
+"""
+Precomputed filter bitmaps over the unfiltered per-truck KPI table.
+
+compute_per_truck_metrics() filters after the per-truck fold: a date comparison, an isin
+on Product_Group and, for the upload type, a join of a freshly deduplicated security map.
+KpiFilterIndex runs the fold and that join once per snapshot, then keeps one packed
+bitmap (np.packbits, 1 bit per KPI row) per
+
+    Product_Group value, direction (Coming_to_Upload_or_Unload) value, Date
+
+A sidebar filter combination is an OR over the selected products ANDed with the direction
+and date bitmaps, applied to the already sorted table. The rows are the same, in the same
+order, as compute_per_truck_metrics(..., selected_date, product_filter, upload_type).
+"""
+import numpy as np
+import pandas as pd
+
+
+def _bitmaps(values):
+    """value -> packed bitmap of the rows holding it (missing values get none)."""
+    codes, uniques = pd.factorize(values)
+    return {u: np.packbits(codes == i) for i, u in enumerate(uniques)}
+
+
+class KpiFilterIndex:
+
+    def __init__(self, kpi, df_security):
+        """`kpi`: compute_per_truck_metrics() output without filters; `df_security`: its security frame."""
+        self.kpi = kpi
+        self.n = len(self.kpi)
+        # same direction rule as compute_per_truck_metrics: the plate's first security row
+        if "Coming_to_Upload_or_Unload" in df_security.columns:
+            sec_map = df_security.drop_duplicates("Truck_Plate_Number").set_index("Truck_Plate_Number")
+            direction = self.kpi["Truck_Plate_Number"].map(sec_map["Coming_to_Upload_or_Unload"])
+        else:
+            direction = None
+        self._products = _bitmaps(self.kpi["Product_Group"])
+        self._directions = _bitmaps(direction) if direction is not None else None
+        self._dates = _bitmaps(self.kpi["Date"])
+        self._none = np.packbits(np.zeros(self.n, dtype=bool))
+
+    def bitmap(self, selected_date=None, product_filter=None, upload_type=None):
+        """Packed bitmap of the rows passing the filters (None = no filter at all)."""
+        parts = []
+        if selected_date is not None:
+            parts.append(self._dates.get(selected_date, self._none))
+        if product_filter:
+            parts.append(np.bitwise_or.reduce(
+                [self._products.get(p, self._none) for p in product_filter]))
+        if upload_type and self._directions is not None:
+            parts.append(self._directions.get(upload_type, self._none))
+        return np.bitwise_and.reduce(parts) if parts else None
+
+    def select(self, selected_date=None, product_filter=None, upload_type=None):
+        """Filtered KPI rows, as compute_per_truck_metrics() would return them."""
+        bits = self.bitmap(selected_date, product_filter, upload_type)
+        if bits is None:
+            return self.kpi
+        return self.kpi[np.unpackbits(bits, count=self.n).astype(bool)]
@@ -0,0 +1,252 @@
+# data/ingest.py
+"""
+Optional push ingestion: a small local HTTP endpoint that accepts individual form rows
+(e.g. from an Apps Script onFormSubmit trigger) and merges them into the next snapshot,
+so a gate scan shows up without waiting for the sheet export poll.
+
+    POST /ingest/<sheet>   body: one JSON object or a list of them
+                           sheet: security | driver | status | logistic
+    GET  /health
+
+Rows may use either the raw sheet headers or the cleaned names from data/processor.py;
+they are stored in raw form so the normal clean_sheet_dfs() path handles them. Unknown
+columns, non-scalar values (e.g. namedValues arrays) and non-numeric weights/capacities
+are rejected with 400; numeric text such as "12.5" is stored as a number.
+Pushed Timestamps are rewritten in the sheet's own format (the one pandas infers from its
+first value) when merged, since clean_sheet_dfs() parses the column with that one format.
+The periodic sheet export stays the source of truth: pushed rows are dropped once the
+export contains them, or after INGEST_RETENTION_SECONDS if it never does.
+"""
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pandas as pd
+from pandas.tseries.api import guess_datetime_format
+
+from config.config import INGEST_HOST, INGEST_PORT, INGEST_TOKEN, INGEST_RETENTION_SECONDS
+from data.processor import (
+    SECURITY_RENAME, DRIVER_RENAME, STATUS_RENAME, LOGISTIC_RENAME,
+    gate_map, load_map, product_map, status_map_full,
+)
+from utils.time_utils import active_tz
+
+SHEET_RENAMES = {
+    'security': SECURITY_RENAME,
+    'driver': DRIVER_RENAME,
+    'status': STATUS_RENAME,
+    'logistic': LOGISTIC_RENAME,
+}
+
+# cleaned column -> value map applied by clean_sheet_dfs()
+SHEET_VALUE_MAPS = {
+    'security': {"Scan_In_or_Out": gate_map, "Coming_to_Upload_or_Unload": load_map},
+    'driver': {},
+    'status': {"Product_Group": product_map, "Status": status_map_full},
+    'logistic': {"Product_Group": product_map},
+}
+
+# raw columns besides the renamed ones
+SHEET_EXTRA_COLUMNS = {
+    'security': ("Timestamp",),
+    'driver': ("Timestamp",),
+    'status': ("Timestamp", "Status"),
+    'logistic': ("Timestamp",),
+}
+
+# numeric sheet columns (read_csv parses them as numbers); pushed text would make them mixed
+NUMERIC_COLUMNS = {"Truck_Load_Capacity_by_Security", "Truck_Load_Capacity_by_Driver", "Total_Weight_MT"}
+
+PLATE_COL = "Truck_Plate_Number"
+
+# Google Forms response sheets; used when the sheet has no Timestamp to infer one from
+SHEET_TIMESTAMP_FORMAT = "%m/%d/%Y %H:%M:%S"
+
+_lock = threading.Lock()
+_pending = {name: [] for name in SHEET_RENAMES}   # sheet -> [(received_at, raw_row)]
+_server = None
+
+
+class IngestError(ValueError):
+    """Raised when a pushed row does not match the sheet schema."""
+
+
+def _to_number(sheet, column, value):
+    """Numeric cell from a pushed value (Apps Script sends strings); blank -> None."""
+    if value is None or (isinstance(value, str) and not value.strip()):
+        return None
+    if isinstance(value, bool):
+        raise IngestError(f"{sheet}.{column}: expected a number, got {value!r}")
+    try:
+        return float(pd.to_numeric(value))
+    except (ValueError, TypeError):
+        raise IngestError(f"{sheet}.{column}: expected a number, got {value!r}")
+
+
+def normalize_row(sheet: str, row: dict) -> dict:
+    """
+    Validate one pushed row and return it keyed by the raw sheet headers, with raw
+    (Khmer) values for mapped columns. Raises IngestError on bad input.
+    """
+    if sheet not in SHEET_RENAMES:
+        raise IngestError(f"unknown sheet: {sheet}")
+    if not isinstance(row, dict):
+        raise IngestError("row must be a JSON object")
+
+    rename = SHEET_RENAMES[sheet]
+    inverse = {v: k for k, v in rename.items()}
+    value_maps = SHEET_VALUE_MAPS[sheet]
+
+    known = set(rename) | set(inverse) | set(SHEET_EXTRA_COLUMNS[sheet])
+
+    out = {}
+    for key, value in row.items():
+        if key not in known:
+            raise IngestError(f"{sheet}: unknown column {key!r}")
+        if value is not None and not isinstance(value, (str, int, float, bool)):
+            # e.g. Apps Script namedValues sends arrays
+            raise IngestError(f"{sheet}.{key}: expected a single value, got {type(value).__name__}")
+        clean_name = rename.get(key, key)
+        raw_name = inverse.get(key, key)
+        if clean_name in NUMERIC_COLUMNS:
+            value = _to_number(sheet, clean_name, value)
+        vmap = value_maps.get(clean_name)
+        if vmap is not None and value is not None:
+            if value in vmap:
+                pass
+            elif value in vmap.values():
+                value = {v: k for k, v in vmap.items()}[value]
+            else:
+                raise IngestError(f"{sheet}.{clean_name}: unexpected value {value!r}")
+        out[raw_name] = value
+
+    if not out.get("Timestamp"):
+        raise IngestError("missing Timestamp")
+    if pd.isna(pd.to_datetime(out["Timestamp"], errors="coerce")):
+        raise IngestError(f"unparseable Timestamp: {out['Timestamp']!r}")
+    if not out.get(inverse[PLATE_COL]):
+        raise IngestError(f"missing {PLATE_COL}")
+    return out
+
+
+def push_rows(sheet: str, rows):
+    """Validate and queue rows for `sheet`. Returns the number of rows accepted."""
+    if isinstance(rows, dict):
+        rows = [rows]
+    if not isinstance(rows, list):
+        raise IngestError("body must be a JSON object or a list of them")
+    normalized = [normalize_row(sheet, r) for r in rows]
+    now = time.time()
+    with _lock:
+        _pending[sheet].extend((now, r) for r in normalized)
+    return len(normalized)
+
+
+def _wall_time(value):
+    """Pushed Timestamp as naive site wall time (what the sheet holds)."""
+    ts = pd.Timestamp(value)
+    if ts.tzinfo is not None:
+        ts = ts.tz_convert(active_tz()).tz_localize(None)
+    return ts
+
+
+def _sheet_timestamp(value, column):
+    """Pushed Timestamp written like the sheet's `column` (site wall time, or a sheet serial)."""
+    ts = _wall_time(value)
+    if pd.api.types.is_numeric_dtype(column.dtype):
+        return (ts - pd.Timestamp("1899-12-30")) / pd.Timedelta(days=1)
+    first = column.dropna()
+    fmt = guess_datetime_format(str(first.iloc[0])) if not first.empty else None
+    return ts.strftime(fmt or SHEET_TIMESTAMP_FORMAT)
+
+
+def _row_keys(df, plate_col):
+    ts = pd.to_datetime(df["Timestamp"], errors="coerce")
+    return set(zip(ts, df[plate_col].astype(str)))
+
+
+def merge_pushed_rows(raw_dfs: dict) -> dict:
+    """
+    Append pending pushed rows to a freshly loaded raw snapshot. Rows the export
+    already contains (same Timestamp + plate) or older than the retention window
+    are reconciled away.
+    """
+    cutoff = time.time() - INGEST_RETENTION_SECONDS
+    merged = dict(raw_dfs)
+    with _lock:
+        for sheet, pending in _pending.items():
+            if not pending or sheet not in raw_dfs:
+                continue
+            df = raw_dfs[sheet]
+            plate_col = {v: k for k, v in SHEET_RENAMES[sheet].items()}[PLATE_COL]
+            seen = _row_keys(df, plate_col) if {"Timestamp", plate_col} <= set(df.columns) else set()
+
+            keep = []
+            for received_at, row in pending:
+                key = (_wall_time(row["Timestamp"]), str(row[plate_col]))
+                if received_at >= cutoff and key not in seen:
+                    keep.append((received_at, row))
+            _pending[sheet] = keep
+
+            if keep:
+                rows = pd.DataFrame([r for _, r in keep])
+                if "Timestamp" in df.columns:
+                    rows["Timestamp"] = [_sheet_timestamp(v, df["Timestamp"]) for v in rows["Timestamp"]]
+                merged[sheet] = pd.concat([df, rows], ignore_index=True)
+    return merged
+
+
+def pending_counts():
+    with _lock:
+        return {sheet: len(rows) for sheet, rows in _pending.items()}
+
+
+class _IngestHandler(BaseHTTPRequestHandler):
+
+    def _reply(self, code, payload):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(code)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path.rstrip("/") == "/health":
+            self._reply(200, {"ok": True, "pending": pending_counts()})
+        else:
+            self._reply(404, {"error": "not found"})
+
+    def do_POST(self):
+        parts = self.path.strip("/").split("/")
+        if len(parts) != 2 or parts[0] != "ingest" or parts[1] not in SHEET_RENAMES:
+            self._reply(404, {"error": "use POST /ingest/<security|driver|status|logistic>"})
+            return
+        if INGEST_TOKEN and self.headers.get("X-Ingest-Token") != INGEST_TOKEN:
+            self._reply(401, {"error": "bad token"})
+            return
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+            rows = json.loads(self.rfile.read(length).decode("utf-8"))
+            accepted = push_rows(parts[1], rows)
+        except (ValueError, UnicodeDecodeError) as e:
+            # IngestError and json.JSONDecodeError are both ValueErrors
+            self._reply(400, {"error": str(e)})
+            return
+        self._reply(202, {"accepted": accepted})
+
+    def log_message(self, format, *args):
+        # keep the Streamlit console quiet
+        pass
+
+
+def start_ingest_server(host=INGEST_HOST, port=INGEST_PORT):
+    """Start the ingestion endpoint in a daemon thread (idempotent per process)."""
+    global _server
+    with _lock:
+        if _server is not None:
+            return _server
+        _server = ThreadingHTTPServer((host, port), _IngestHandler)
+    threading.Thread(target=_server.serve_forever, name="ingest-server", daemon=True).start()
+    return _server
@@ -1,10 +1,20 @@
 # data/loader.py
+import threading
+import time
+
 import pandas as pd
-from config.config import SPREADSHEET_ID, SHEET_GIDS
+from config.config import (
+    SPREADSHEET_ID, SHEET_GIDS, INGEST_ENABLED, SITES, DEFAULT_SITE,
+    POLL_BOUNDS, YARD_HOURS, POLL_IDLE_MAX_SECONDS, POLL_ERROR_MAX_SECONDS, SHARED_SNAPSHOT_DIR,
+)
+from data.snapshot import build_manifest, snapshot_date, sheet_hash
+from data.ingest import merge_pushed_rows, start_ingest_server
+from data.shared_snapshot import load_shared_snapshot, published_max_timestamp
+from utils.time_utils import now_local, set_active_tz
 import streamlit as st
 
-def _sheet_csv_url(gid: str):
-    return f"https://docs.google.com/spreadsheets/d/{SPREADSHEET_ID}/export?format=csv&gid={gid}"
+def _sheet_csv_url(gid: str, spreadsheet_id: str = SPREADSHEET_ID):
+    return f"https://docs.google.com/spreadsheets/d/{spreadsheet_id}/export?format=csv&gid={gid}"
 
 @st.cache_data(ttl=15)  # cache for 15 seconds (adjust)
 def load_sheet_by_gid(gid: str):
@@ -20,9 +30,158 @@ def load_all_sheets():
         'logistic': load_sheet_by_gid(SHEET_GIDS['logistic']),
     }
 
-def get_current_date_from_sheets(dfs: dict):
+# ---------------- adaptive per-sheet polling ----------------
+# Process-wide schedule per (site, sheet): each sheet is refetched only when its own interval elapsed.
+# A change halves the interval (down to the sheet's min), an unchanged fetch grows it by
+# 1.5x (up to its max, or POLL_IDLE_MAX_SECONDS outside YARD_HOURS), and an upstream
+# error/throttle doubles it (up to POLL_ERROR_MAX_SECONDS) while the last good frame is served.
+
+_poll_lock = threading.Lock()
+_poll = {}
+
+
+def _poll_state(site, name):
+    if (site, name) not in _poll:
+        lo, _ = POLL_BOUNDS[name]
+        _poll[(site, name)] = {
+            "interval": lo, "next_fetch": 0.0, "df": None, "hash": None,
+            "fetches": 0, "skipped": 0, "changes": 0, "errors": 0,
+            "last_change": None, "last_error": None,
+            "lock": threading.Lock(),
+        }
+    return _poll[(site, name)]
+
+
+def _max_interval(name):
+    lo, hi = POLL_BOUNDS[name]
+    start, end = YARD_HOURS
+    if start <= now_local().hour < end:
+        return hi
+    return max(hi, POLL_IDLE_MAX_SECONDS)
+
+
+def _poll_sheet(name, site=DEFAULT_SITE):
+    with _poll_lock:
+        state = _poll_state(site, name)
+    with state["lock"]:
+        now = time.time()
+        if state["df"] is not None and now < state["next_fetch"]:
+            state["skipped"] += 1
+            return state["df"], state["hash"]
+
+        lo, _ = POLL_BOUNDS[name]
+        try:
+            cfg = SITES[site]
+            df = pd.read_csv(_sheet_csv_url(cfg["sheet_gids"][name], cfg["spreadsheet_id"]))
+        except Exception as e:
+            state["errors"] += 1
+            state["last_error"] = f"{type(e).__name__}: {e}"
+            state["interval"] = min(max(state["interval"], lo) * 2, POLL_ERROR_MAX_SECONDS)
+            state["next_fetch"] = now + state["interval"]
+            if state["df"] is None:
+                raise
+            return state["df"], state["hash"]
+
+        state["fetches"] += 1
+        h = sheet_hash(df)
+        if h != state["hash"]:
+            if state["hash"] is not None:
+                state["changes"] += 1
+                state["last_change"] = now_local()
+            state["interval"] = max(lo, state["interval"] / 2)
+            state["hash"] = h
+            state["df"] = df
+        else:
+            state["interval"] = min(state["interval"] * 1.5, _max_interval(name))
+        state["next_fetch"] = now + state["interval"]
+        return state["df"], state["hash"]
+
+
+def _poll_all(site):
+    """(frames, content hashes) of the site's sheets; the hashes come from the poller."""
+    polled = {name: _poll_sheet(name, site) for name in ('security', 'driver', 'status', 'logistic')}
+    return {name: df for name, (df, _) in polled.items()}, {name: h for name, (_, h) in polled.items()}
+
+
+def load_all_sheets_adaptive(site=DEFAULT_SITE):
+    return _poll_all(site)[0]
+
+
+def reset_poll_schedule():
+    """Force every sheet to be refetched on the next load (manual refresh)."""
+    with _poll_lock:
+        for state in _poll.values():
+            state["next_fetch"] = 0.0
+
+
+def poll_status():
+    """Per-sheet cadence for the debug panel."""
+    now = time.time()
+    rows = []
+    with _poll_lock:
+        for (site, name), state in _poll.items():
+            rows.append({
+                "Site": site,
+                "Sheet": name,
+                "Interval_s": round(state["interval"], 1),
+                "Next_fetch_in_s": max(0, round(state["next_fetch"] - now, 1)),
+                "Fetches": state["fetches"],
+                "Skipped": state["skipped"],
+                "Changes": state["changes"],
+                "Errors": state["errors"],
+                "Last_change": state["last_change"],
+                "Last_error": state["last_error"],
+            })
+    return pd.DataFrame(rows)
+
+
+def load_snapshot(site=DEFAULT_SITE, ingest=True):
+    """
+    Load all sheets of `site` and return (raw_dfs, manifest); see data/snapshot.py.
+    Also makes the site's timezone the active one for parsing/display in this context.
+    `ingest=False` keeps this process from serving the push endpoint (headless workers
+    and CLIs, which would otherwise hold the port and keep pushed rows from the app).
+    With SHARED_SNAPSHOT_DIR the frames are the already cleaned ones snapshot_worker.py
+    published (memory-mapped CleanedSheets, see data/shared_snapshot.py; clean_sheet_dfs()
+    passes them through). Until it published one, or while its pointer is stale, fetch
+    ourselves (without the push endpoint, which stays with the worker).
+    """
+    if SHARED_SNAPSHOT_DIR:
+        set_active_tz(SITES[site]["timezone"])
+        dfs, pointer = load_shared_snapshot(site)
+        if dfs is not None:
+            return dfs, build_manifest(dfs, site, hashes=pointer["hashes"],
+                                       max_timestamp=published_max_timestamp(pointer))
+        ingest = False
+    return fetch_snapshot(site, ingest)
+
+
+def fetch_snapshot(site=DEFAULT_SITE, ingest=True):
+    """
+    load_snapshot() straight from the sheets (adaptive polling + pushed rows). The manifest
+    reuses the poller's sheet hashes; only sheets with pushed rows appended are hashed again.
+    """
+    set_active_tz(SITES[site]["timezone"])
+    raw_dfs, hashes = _poll_all(site)
+    if INGEST_ENABLED and ingest and site == DEFAULT_SITE:
+        # the push endpoint feeds the default site only
+        try:
+            start_ingest_server()
+        except OSError:
+            # port already taken (e.g. another app process serves it) -> polling only
+            pass
+        # rows pushed since the last export; the export reconciles them away
+        merged = merge_pushed_rows(raw_dfs)
+        hashes = {name: h if merged[name] is raw_dfs[name] else sheet_hash(merged[name])
+                  for name, h in hashes.items()}
+        raw_dfs = merged
+    return raw_dfs, build_manifest(raw_dfs, site, hashes=hashes)
+
+def get_current_date_from_sheets(dfs: dict, manifest=None):
     # return the max date across Timestamp columns (date part)
-    import pandas as pd
+    if manifest is not None:
+        # already computed once per changed sheet when the manifest was built
+        return snapshot_date(manifest)
     max_dates = []
     for df in dfs.values():
         if "Timestamp" in df.columns:
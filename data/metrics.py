@@ -1,34 +1,29 @@
 # data/metrics.py (final version for now)
 import pandas as pd
 import numpy as np
+from data.engines import get_engine
+from utils.time_utils import to_epoch_ns, epoch_local_date, NS_PER_MIN
+
+# Event times are Int64 UTC epoch ns (see utils/time_utils.py); these KPI columns carry them.
+KPI_TIME_COLS = ["Arrival_Time", "Start_Loading_Time", "Completed_Time"]
 
 def _safe_min(series):
     s = series.dropna()
-    return s.min() if not s.empty else pd.NaT
+    return s.min() if not s.empty else pd.NA
 
 def _safe_max(series):
     s = series.dropna()
-    return s.max() if not s.empty else pd.NaT
-
-def compute_per_truck_metrics(
-    df_security,
-    df_status,
-    df_logistic,
-    df_driver,
-    selected_date=None,
-    product_filter=None,
-    upload_type=None,
-    use_fallbacks=False
-):
-    # ensure timestamps
-    for df in [df_security, df_status, df_logistic, df_driver]:
-        if "Timestamp" in df.columns:
-            df["Timestamp"] = pd.to_datetime(df["Timestamp"], errors="coerce")
+    return s.max() if not s.empty else pd.NA
 
+def _per_truck_core(df_security, df_status, df_logistic, df_driver):
+    """
+    One row per truck (unfiltered): Arrival/Start_Loading/Completed times, durations, Date,
+    Data_Quality_Flag. Reference (pandas) implementation; see data/engines.py.
+    """
     # ---- Status events only ----
-    arrival = df_status[df_status["Status"] == "Arrival"].groupby("Truck_Plate_Number")["Timestamp"].agg(_safe_min).rename("Arrival_Time")
-    start_loading = df_status[df_status["Status"] == "Start_Loading"].groupby("Truck_Plate_Number")["Timestamp"].agg(_safe_min).rename("Start_Loading_Time")
-    completed_all = df_status[df_status["Status"] == "Completed"].copy()
+    arrival = df_status[df_status["Status"] == "Arrival"].groupby("Truck_Plate_Number")["Timestamp"].min().rename("Arrival_Time")
+    start_loading = df_status[df_status["Status"] == "Start_Loading"].groupby("Truck_Plate_Number")["Timestamp"].min().rename("Start_Loading_Time")
+    completed_all = df_status[(df_status["Status"] == "Completed") & df_status["Timestamp"].notna()].copy()
 
     prod_from_status = df_status.groupby("Truck_Plate_Number")["Product_Group"].agg(lambda s: s.dropna().iloc[0] if not s.dropna().empty else np.nan)
     prod_from_log = df_logistic.groupby("Truck_Plate_Number")["Product_Group"].agg(lambda s: s.dropna().iloc[0] if not s.dropna().empty else np.nan)
@@ -48,9 +43,9 @@ def compute_per_truck_metrics(
     completed_grouped = completed_all.groupby("Truck_Plate_Number")["Timestamp"].apply(list).to_dict()
     end_times = {}
     for truck in kpi.index:
-        start_ts = kpi.at[truck, "Start_Loading_Time"] if "Start_Loading_Time" in kpi.columns else pd.NaT
+        start_ts = kpi.at[truck, "Start_Loading_Time"] if "Start_Loading_Time" in kpi.columns else pd.NA
         comp_list = completed_grouped.get(truck, [])
-        chosen = pd.NaT
+        chosen = pd.NA
         if comp_list:
             if pd.notna(start_ts):
                 later = [t for t in comp_list if t >= start_ts]
@@ -58,19 +53,17 @@ def compute_per_truck_metrics(
             else:
                 chosen = comp_list[0]
         end_times[truck] = chosen
-    kpi["Completed_Time"] = pd.Series(end_times)
+    kpi["Completed_Time"] = pd.Series(end_times, index=kpi.index, dtype="Int64")
 
-    # Durations
+    # Durations (integer ns differences -> float minutes, NaN where an end is missing)
     def td_min(a, b):
-        if pd.isna(a) or pd.isna(b):
-            return np.nan
-        return (b - a) / pd.Timedelta(minutes=1)
+        return ((b - a) / NS_PER_MIN).to_numpy(dtype="float64", na_value=np.nan)
 
-    kpi["Waiting_min"] = kpi.apply(lambda r: td_min(r["Arrival_Time"], r["Start_Loading_Time"]), axis=1)
-    kpi["Loading_min"] = kpi.apply(lambda r: td_min(r["Start_Loading_Time"], r["Completed_Time"]), axis=1)
-    kpi["Total_min"] = kpi.apply(lambda r: td_min(r["Arrival_Time"], r["Completed_Time"]), axis=1)
+    kpi["Waiting_min"] = td_min(kpi["Arrival_Time"], kpi["Start_Loading_Time"])
+    kpi["Loading_min"] = td_min(kpi["Start_Loading_Time"], kpi["Completed_Time"])
+    kpi["Total_min"] = td_min(kpi["Arrival_Time"], kpi["Completed_Time"])
 
-    kpi["Date"] = pd.to_datetime(kpi["Arrival_Time"]).dt.date
+    kpi["Date"] = epoch_local_date(kpi["Arrival_Time"])
 
     # Quality flag
     def flag(r):
@@ -82,6 +75,26 @@ def compute_per_truck_metrics(
     kpi["Data_Quality_Flag"] = kpi.apply(flag, axis=1)
 
     kpi = kpi.reset_index()
+    return kpi
+
+
+def compute_per_truck_metrics(
+    df_security,
+    df_status,
+    df_logistic,
+    df_driver,
+    selected_date=None,
+    product_filter=None,
+    upload_type=None,
+    use_fallbacks=False,
+    engine=None
+):
+    # ensure timestamps
+    for df in [df_security, df_status, df_logistic, df_driver]:
+        if "Timestamp" in df.columns:
+            df["Timestamp"] = to_epoch_ns(df["Timestamp"])
+
+    kpi = get_engine(engine).per_truck_core(df_security, df_status, df_logistic, df_driver)
 
     # Apply filters
     if selected_date is not None:
@@ -101,3 +114,223 @@ def compute_per_truck_metrics(
         "Data_Quality_Flag"
     ]
     return kpi[cols].sort_values(["Product_Group", "Date", "Truck_Plate_Number"])
+
+
+def first_arrival_dates(df_status):
+    """
+    Local date of each plate's first Arrival (Series indexed by Truck_Plate_Number): the Date
+    its KPI row gets. compute_per_truck_metrics() folds a plate's whole history into one row,
+    so that row belongs to this day and no other.
+    """
+    arrivals = df_status[(df_status["Status"] == "Arrival") & df_status["Timestamp"].notna()]
+    first = arrivals.groupby("Truck_Plate_Number")["Timestamp"].min()
+    return pd.Series(epoch_local_date(first).to_numpy(), index=first.index, name="Date")
+
+
+def plate_history(dfs, plates):
+    """Every row of `plates` in each sheet (sheet order, untimed rows included): the input the fold needs for them."""
+    plates = set(plates)
+    return {name: df[df["Truck_Plate_Number"].isin(plates)] for name, df in dfs.items()}
+
+
+def _compute_mission(row):
+    """Return mission status text based on existence of Start_Loading_Time and Completed_Time."""
+    start = row.get("Start_Loading_Time")
+    completed = row.get("Completed_Time")
+
+    if pd.notna(completed):
+        return "Done"
+    missing_start = pd.isna(start)
+    missing_completed = pd.isna(completed)
+
+    if missing_start and missing_completed:
+        return "Missing Start loading, completed"
+    if missing_start:
+        return "Missing Start Loading"
+    if missing_completed:
+        return "Missing Completed"
+    return "Pending"  # fallback (shouldn't normally happen)
+
+
+def compute_truck_dimension(dfs):
+    """
+    Truck dimension: one row per Truck_Plate_Number (index) with the attributes sections join
+    onto events and KPIs:
+      - Product_Group:              first non-empty value in status
+      - Coming_to_Upload_or_Unload: first non-empty value in security
+      - Driver_Name, Phone_Number:  latest non-empty values in driver
+      - Total_Weight_MT:            sum over logistic rows
+    """
+    plates = set()
+    for df in dfs.values():
+        if df is not None and "Truck_Plate_Number" in df.columns:
+            plates |= set(df["Truck_Plate_Number"].dropna().unique())
+    trucks = pd.DataFrame(index=pd.Index(sorted(plates), name="Truck_Plate_Number"))
+
+    df_status = dfs.get('status')
+    if df_status is not None and "Product_Group" in df_status.columns:
+        trucks = trucks.join(df_status.groupby("Truck_Plate_Number")["Product_Group"].agg("first"))
+    else:
+        trucks["Product_Group"] = None
+
+    df_security = dfs.get('security')
+    if df_security is not None and "Coming_to_Upload_or_Unload" in df_security.columns:
+        trucks = trucks.join(df_security.groupby("Truck_Plate_Number")["Coming_to_Upload_or_Unload"].agg("first"))
+    else:
+        trucks["Coming_to_Upload_or_Unload"] = None
+
+    df_driver = dfs.get('driver')
+    for col in ("Driver_Name", "Phone_Number"):
+        if df_driver is not None and col in df_driver.columns:
+            trucks = trucks.join(df_driver.sort_values("Timestamp").groupby("Truck_Plate_Number")[col].agg("last"))
+        else:
+            trucks[col] = None
+
+    df_logistic = dfs.get('logistic')
+    if df_logistic is not None and "Total_Weight_MT" in df_logistic.columns:
+        trucks = trucks.join(df_logistic.groupby("Truck_Plate_Number")["Total_Weight_MT"].agg("sum"))
+    else:
+        trucks["Total_Weight_MT"] = None
+    return trucks
+
+
+def compute_loading_durations(df_kpi, trucks):
+    """
+    Loading Durations Status rows: per-truck KPI plus Total_Weight_MT, Loading_Rate and Mission.
+    `trucks` is the truck dimension (compute_truck_dimension).
+    """
+    df_kpi = df_kpi.copy()
+
+    # Total_Weight_MT: sum over the truck's logistic rows
+    df_kpi = df_kpi.join(trucks["Total_Weight_MT"], on="Truck_Plate_Number")
+
+    # Compute Loading_Rate (Loading_min per MT)
+    def compute_rate(r):
+        try:
+            lm = r.get("Loading_min")
+            wt = r.get("Total_Weight_MT")
+            if pd.isna(lm) or pd.isna(wt) or wt == 0:
+                return None
+            return lm / wt
+        except Exception:
+            return None
+
+    df_kpi["Loading_Rate"] = df_kpi.apply(compute_rate, axis=1)
+
+    # Add Mission column
+    df_kpi["Mission"] = df_kpi.apply(_compute_mission, axis=1)
+
+    # Reorder columns for display (adjust as you prefer)
+    display_cols = [
+        "Product_Group",
+        "Truck_Plate_Number",
+        "Date",
+        "Arrival_Time",
+        "Start_Loading_Time",
+        "Completed_Time",
+        "Waiting_min",
+        "Loading_min",
+        "Total_min",    
+        "Total_Weight_MT",
+        "Loading_Rate",
+        "Mission",
+        # "Data_Quality_Flag"  
+    ]
+    # keep only columns that exist
+    display_cols = [c for c in display_cols if c in df_kpi.columns]
+    return df_kpi[display_cols]
+
+
+def compute_daily_performance(df_kpi, trucks, selected_date=None):
+    """
+    Aggregate per-truck KPI rows by Product_Group and Coming_to_load_or_Unload:
+    Total_truck, Total_weight_MT, Total_min and Loading_Rate (min per MT).
+    `trucks` is the truck dimension (compute_truck_dimension).
+    """
+    # direction (from security) and weight (from logistic) per truck
+    dims = trucks[["Coming_to_Upload_or_Unload", "Total_Weight_MT"]].rename(
+        columns={"Coming_to_Upload_or_Unload": "Coming_to_load_or_Unload"})
+    merged = df_kpi.join(dims, on="Truck_Plate_Number")
+
+    # If selected_date provided ensure Date column is a date type
+    if "Date" in merged.columns and selected_date is not None:
+        merged = merged[pd.to_datetime(merged["Date"]).dt.date == selected_date]
+
+    # Final aggregation grouped by Product_Group and Coming_to_load_or_Unload
+    agg = merged.groupby(["Product_Group", "Coming_to_load_or_Unload"], dropna=False).agg(
+        Total_truck=("Truck_Plate_Number", lambda s: s.nunique()),
+        Total_weight_MT=("Total_Weight_MT", "sum"),
+        Total_min=("Total_min", "sum")
+    ).reset_index()
+
+    # Compute Loading_Rate (min per MT). Avoid division by zero.
+    def compute_rate(row):
+        wt = row["Total_weight_MT"]
+        tm = row["Total_min"]
+        if pd.isna(wt) or wt == 0:
+            return None
+        if pd.isna(tm):
+            return None
+        return tm / wt
+
+    agg["Loading_Rate"] = agg.apply(compute_rate, axis=1)
+
+    return agg
+
+
+def compute_status_counts(df_status, product_filter=None, selected_date=None):
+    """
+    Trucks per real-time status (Arrival / Start_Loading / Completed) using the *latest*
+    status per truck. None when there is no status data.
+    """
+    if df_status.empty or "Truck_Plate_Number" not in df_status.columns:
+        return None
+    df_status = df_status.assign(Timestamp=to_epoch_ns(df_status["Timestamp"]))
+
+    # Keep the latest record per truck
+    df_latest = df_status.sort_values("Timestamp").groupby("Truck_Plate_Number").last().reset_index()
+
+    if product_filter:
+        df_latest = df_latest[df_latest["Product_Group"].isin(product_filter)]
+    if selected_date:
+        df_latest = df_latest[epoch_local_date(df_latest["Timestamp"]) == selected_date]
+
+    counts = df_latest["Status"].value_counts()
+    return {status: int(counts.get(status, 0)) for status in ("Arrival", "Start_Loading", "Completed")}
+
+
+def compute_waiting_trucks(df_status, trucks, now_ns, product_filter=None, upload_type=None, selected_date=None):
+    """
+    Trucks waiting at `now_ns` (Arrival and no Start_Loading yet), with Waiting_min so far and
+    direction / driver details from the truck dimension.
+    """
+    df_status = df_status.assign(Timestamp=to_epoch_ns(df_status["Timestamp"]))
+
+    # Get Arrival and Start_Loading times
+    arrivals = df_status[df_status["Status"] == "Arrival"].groupby("Truck_Plate_Number")["Timestamp"].min().rename("Arrival_Time")
+    starts = df_status[df_status["Status"] == "Start_Loading"].groupby("Truck_Plate_Number")["Timestamp"].min().rename("Start_Loading_Time")
+
+    waiting = arrivals.to_frame().join(starts, how="left")
+    waiting = waiting[(waiting["Start_Loading_Time"].isna()) | (waiting["Start_Loading_Time"] > now_ns)]
+    waiting = waiting.join(trucks[["Coming_to_Upload_or_Unload", "Driver_Name", "Phone_Number", "Product_Group"]], how="left")
+
+    # Filters
+    if product_filter:
+        waiting = waiting[waiting["Product_Group"].isin(product_filter)]
+    if upload_type:
+        waiting = waiting[waiting["Coming_to_Upload_or_Unload"] == upload_type]
+    if selected_date:
+        waiting = waiting[epoch_local_date(waiting["Arrival_Time"]) == selected_date]
+
+    waiting["Waiting_min"] = ((now_ns - waiting["Arrival_Time"]) / NS_PER_MIN).astype("float64")
+
+    cols = [
+        "Product_Group",
+        "Coming_to_Upload_or_Unload",
+        "Truck_Plate_Number",
+        "Arrival_Time",
+        "Waiting_min",
+        "Driver_Name",
+        "Phone_Number"
+    ]
+    return waiting.reset_index()[cols]
@@ -0,0 +1,230 @@
+# data/pipeline.py
+"""
+Lazy, memoized stage DAG behind the dashboards (main_app / host_app / local_app).
+
+    raw -> clean -> asof ------------------------------+
+             |                                         |
+             +-> frames ----> trucks ---------+        |
+             |      +-------> kpi_index -> kpi +--> loading_durations, daily_performance
+             |      +-------> status_summary, waiting (uses trucks)
+             +-> history ---> kpi_history --> sla (uses history_trucks)
+                                      +-------> activity_visits --> activity
+
+A stage runs only when something asks for it (a visible section), at most once per run,
+and is memoized across reruns by its input version: the snapshot manifest (sheet hashes)
+plus the sidebar parameters it and its upstream stages read. `raw` is the version source
+and `waiting` depends on the clock, so neither is memoized; `kpi` only applies the
+precomputed filter bitmaps of `kpi_index`. Without the event store `frames` is the full
+history, so kpi_history / history_trucks are the unfiltered kpi_index table / trucks and
+the per-truck fold runs once per snapshot.
+"""
+from datetime import timedelta
+
+from config.config import EVENT_STORE_ENABLED, DEFAULT_SITE
+from data.loader import load_snapshot
+from data.processor import clean_sheet_dfs
+from data.snapshot import memoize_stage, stage_key
+from data.store import get_event_store
+from data.asof import get_asof_index
+from data.metrics import (
+    compute_per_truck_metrics, compute_truck_dimension, compute_loading_durations,
+    compute_daily_performance, compute_status_counts, compute_waiting_trucks,
+)
+from data.filters import KpiFilterIndex
+from data.sketches import sla_day_sketches
+from data.timeseries import visit_intervals, activity_series
+from utils.time_utils import local_datetime_ns, now_epoch_ns
+
+# name -> (upstream stages, sidebar params read, memoized, function(pipeline, *upstream values))
+STAGES = {}
+
+
+def stage(name, deps=(), params=(), memo=True):
+    def register(fn):
+        STAGES[name] = (tuple(deps), tuple(params), memo, fn)
+        return fn
+    return register
+
+
+class Pipeline:
+
+    def __init__(self, site=DEFAULT_SITE, **params):
+        self.site = site
+        self.params = {
+            "selected_date": None,
+            "product_selected": None,
+            "upload_type": None,
+            "as_of_time": None,
+            "activity_days": 1,
+        }
+        self._values = {}
+        self.set_params(**params)
+
+    def set_params(self, **params):
+        """Update sidebar parameters; drops this run's values of every stage but `raw`."""
+        self.params.update(params)
+        # the as-of instant only depends on the date while time travelling, so live stages
+        # downstream of `asof` keep their cache entries when the date changes
+        t = self.params["as_of_time"]
+        self.params["as_of"] = None if t is None else (self.params["selected_date"], t)
+        self._values = {k: v for k, v in self._values.items() if k == "raw"}
+
+    @property
+    def manifest(self):
+        return self.get("raw")[1]
+
+    def _param_names(self, name):
+        """Parameters read by `name` and everything upstream of it."""
+        deps, params, _, _ = STAGES[name]
+        names = set(params)
+        for dep in deps:
+            names |= self._param_names(dep)
+        return names
+
+    def key(self, name):
+        extra = []
+        for p in sorted(self._param_names(name)):
+            v = self.params[p]
+            extra.append(tuple(v) if isinstance(v, list) else v)
+        return stage_key(self.manifest, extra=tuple(extra))
+
+    def get(self, name):
+        """Value of stage `name`, evaluating (only) the upstream stages it needs."""
+        if name not in self._values:
+            deps, _, memo, fn = STAGES[name]
+            compute = lambda: fn(self, *(self.get(d) for d in deps))
+            if memo:
+                self._values[name] = memoize_stage(f"pipeline:{name}", self.key(name), compute)
+            else:
+                self._values[name] = compute()
+        return self._values[name]
+
+
+# ---------------- stages ----------------
+
+@stage("raw", memo=False)
+def _raw(pipe):
+    return load_snapshot(pipe.site)
+
+
+@stage("clean", deps=("raw",))
+def _clean(pipe, raw):
+    raw_dfs, _ = raw
+    return clean_sheet_dfs(raw_dfs)
+
+
+@stage("asof", deps=("clean",), params=("as_of",))
+def _asof(pipe, dfs):
+    if pipe.params["as_of"] is None:
+        return None
+    day, t = pipe.params["as_of"]
+    return get_asof_index(dfs, pipe.manifest, day).view(local_datetime_ns(day, t))
+
+
+# without the event store the frames don't depend on the date (all history is loaded anyway)
+@stage("frames", deps=("clean", "asof"), params=("selected_date",) if EVENT_STORE_ENABLED else ())
+def _frames(pipe, dfs, as_of):
+    """Frames the day sections read: as-of cut, event-store day frames, or the cleaned sheets."""
+    if as_of is not None:
+        return as_of.dfs
+    if EVENT_STORE_ENABLED:
+        # ingest each new snapshot once, then answer the day from index scans
+        store = get_event_store(pipe.site)
+        memoize_stage("store_ingest", stage_key(pipe.manifest), lambda: store.ingest_frames(dfs, pipe.manifest["hashes"]))
+        return store.day_frames(pipe.params["selected_date"])
+    return dfs
+
+
+@stage("history", deps=("clean", "asof"))
+def _history(pipe, dfs, as_of):
+    """Full history (as-of cut when time travelling) for multi-day windows."""
+    return as_of.dfs if as_of is not None else dfs
+
+
+@stage("trucks", deps=("frames",))
+def _trucks(pipe, dfs):
+    return compute_truck_dimension(dfs)
+
+
+@stage("kpi_index", deps=("frames", "asof"))
+def _kpi_index(pipe, dfs, as_of):
+    """Unfiltered KPI table plus per-product / direction / day bitmaps (data/filters.py)."""
+    kpi = compute_per_truck_metrics(dfs['security'], dfs['status'], dfs['logistic'], dfs['driver'], engine=as_of)
+    return KpiFilterIndex(kpi, dfs['security'])
+
+
+# a filter change only ANDs precomputed bitmaps, so this isn't worth a cache slot
+@stage("kpi", deps=("kpi_index",), params=("selected_date", "product_selected", "upload_type"), memo=False)
+def _kpi(pipe, index):
+    return index.select(pipe.params["selected_date"], pipe.params["product_selected"], pipe.params["upload_type"])
+
+
+if EVENT_STORE_ENABLED:
+    @stage("history_trucks", deps=("history",))
+    def _history_trucks(pipe, dfs):
+        return compute_truck_dimension(dfs)
+
+    @stage("kpi_history", deps=("history", "asof"))
+    def _kpi_history(pipe, dfs, as_of):
+        return compute_per_truck_metrics(dfs['security'], dfs['status'], dfs['logistic'], dfs['driver'], engine=as_of)
+else:
+    # `frames` already is the full history (or its as-of cut): reuse its truck dimension and
+    # unfiltered fold instead of computing them a second time
+    @stage("history_trucks", deps=("trucks",), memo=False)
+    def _history_trucks(pipe, trucks):
+        return trucks
+
+    @stage("kpi_history", deps=("kpi_index",), memo=False)
+    def _kpi_history(pipe, index):
+        return index.kpi
+
+
+# ---------------- per-section views ----------------
+
+@stage("status_summary", deps=("frames",), params=("product_selected", "selected_date"))
+def _status_summary(pipe, dfs):
+    return compute_status_counts(dfs['status'], pipe.params["product_selected"], pipe.params["selected_date"])
+
+
+@stage("waiting", deps=("frames", "trucks", "asof"), params=("product_selected", "upload_type", "selected_date"), memo=False)
+def _waiting(pipe, dfs, trucks, as_of):
+    now = as_of.as_of if as_of is not None else now_epoch_ns()
+    return compute_waiting_trucks(dfs['status'], trucks, now, pipe.params["product_selected"],
+                                  pipe.params["upload_type"], pipe.params["selected_date"])
+
+
+@stage("loading_durations", deps=("kpi", "trucks"))
+def _loading_durations(pipe, kpi, trucks):
+    return kpi if kpi.empty else compute_loading_durations(kpi, trucks)
+
+
+@stage("daily_performance", deps=("kpi", "trucks"))
+def _daily_performance(pipe, kpi, trucks):
+    if kpi.empty:
+        return None
+    return compute_daily_performance(kpi, trucks, selected_date=pipe.params["selected_date"])
+
+
+@stage("sla", deps=("kpi_history", "history_trucks"))
+def _sla(pipe, kpi, trucks):
+    return None if kpi.empty else sla_day_sketches(kpi, trucks, pipe.site)
+
+
+@stage("activity_visits", deps=("kpi_history", "history_trucks"))
+def _activity_visits(pipe, kpi, trucks):
+    return visit_intervals(kpi, trucks)
+
+
+@stage("activity", deps=("activity_visits", "asof"),
+       params=("selected_date", "product_selected", "upload_type", "activity_days"), memo=False)
+def _activity(pipe, visits, as_of):
+    end = pipe.params["selected_date"]
+    if end is None or visits.empty:
+        return None
+    days = pipe.params["activity_days"]
+    now = as_of.as_of if as_of is not None else now_epoch_ns()
+    # per-day buckets are cached in data/timeseries.py, so widening the range reuses the days
+    # seen and only the day containing `now` is bucketed again
+    return activity_series(visits, end - timedelta(days=days - 1), end,
+                           pipe.params["product_selected"], pipe.params["upload_type"],
+                           median_window="60min" if days == 1 else "1D", now=now, site=pipe.site)
@@ -1,5 +1,5 @@
 # data/processor.py
-import pandas as pd
+from utils.time_utils import to_epoch_ns
 
 # column renames & maps (from your spec)
 SECURITY_RENAME = {
@@ -41,11 +41,20 @@ status_map_full = {
     "មកដល់ច្រករង់ចាំ /Arrival": "Arrival"
 }
 
+class CleanedSheets(dict):
+    """Sheets that already went through clean_sheet_dfs() (also the frames snapshot_worker.py publishes)."""
+
+
 def clean_sheet_dfs(dfs: dict):
     """
     Input: dict of raw dfs from loader (security, driver, status, logistic)
-    Returns: cleaned dict (same keys) with renamed columns, mapping applied, timestamps parsed.
+    Returns: cleaned dict (same keys) with renamed columns, mapping applied, timestamps parsed
+    to Int64 UTC epoch ns (naive sheet times are LOCAL_TZ wall time; see utils/time_utils.py).
+    Already cleaned sheets (CleanedSheets) are returned as they are.
     """
+    if isinstance(dfs, CleanedSheets):
+        return dfs
+
     df_security = dfs['security'].rename(columns=SECURITY_RENAME)
     df_driver = dfs['driver'].rename(columns=DRIVER_RENAME)
     df_status = dfs['status'].rename(columns=STATUS_RENAME)
@@ -54,7 +63,7 @@ def clean_sheet_dfs(dfs: dict):
     # parse timestamps
     for df in (df_security, df_driver, df_status, df_logistic):
         if "Timestamp" in df.columns:
-            df["Timestamp"] = pd.to_datetime(df["Timestamp"], errors="coerce")
+            df["Timestamp"] = to_epoch_ns(df["Timestamp"])
 
     # apply map replacements safely
     if "Scan_In_or_Out" in df_security.columns:
@@ -72,9 +81,9 @@ def clean_sheet_dfs(dfs: dict):
     if "Status" in df_status.columns:
         df_status["Status"] = df_status["Status"].replace(status_map_full)
 
-    return {
+    return CleanedSheets({
         'security': df_security,
         'driver': df_driver,
         'status': df_status,
         'logistic': df_logistic
-    }
+    })
@@ -0,0 +1,204 @@
+# data/shared_snapshot.py
+"""
+Snapshots shared by several app processes through Arrow IPC files.
+
+With SHARED_SNAPSHOT_DIR set, snapshot_worker.py is the only process that fetches, parses
+and cleans the sheets. For every new snapshot it writes the clean_sheet_dfs() output as
+one Arrow IPC file per sheet
+
+    <dir>/<site>-<seq>-<sheet>.arrow
+
+and then atomically replaces the pointer <dir>/<site>.json (seq, files, the raw sheet hashes
+and max timestamps of the manifest, published_at). App processes read the pointer on each
+load_snapshot() and memory-map the files: the epoch-ns Int64 columns and the strings are
+used in place (only the null masks are built), so the pages live in the shared OS page
+cache, not in each replica's heap, and replicas don't re-run clean_sheet_dfs(). A replica
+re-maps only when `seq` changes, and it takes its manifest from the pointer.
+
+The worker rewrites the pointer's `checked_at` on every pass, also when nothing changed.
+A pointer older than SHARED_SNAPSHOT_MAX_AGE_SECONDS means the worker stalled: replicas
+log a warning and fetch the sheets themselves until it is fresh again.
+
+`seq` grows across worker restarts (it continues from the pointer). The last
+SHARED_SNAPSHOT_KEEP versions stay on disk for readers that still map them.
+pyarrow is only needed in this mode.
+"""
+import glob
+import json
+import logging
+import os
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+from config.config import SHARED_SNAPSHOT_DIR, SHARED_SNAPSHOT_KEEP, SHARED_SNAPSHOT_MAX_AGE_SECONDS
+from data.processor import CleanedSheets, clean_sheet_dfs
+
+logger = logging.getLogger(__name__)
+
+_FORMAT = 2     # pointer layout; 2 = cleaned frames (pointers of older workers are ignored)
+
+_lock = threading.Lock()
+_mapped = {}    # (root, site) -> (seq, dfs)
+_stale = set()  # (root, site) currently served by the local fetch
+
+
+def _pyarrow():
+    import pyarrow as pa
+    import pyarrow.ipc  # noqa: F401
+    return pa
+
+
+def _pointer_path(root, site):
+    return os.path.join(root, f"{site}.json")
+
+
+def read_pointer(site, root=SHARED_SNAPSHOT_DIR):
+    """The published pointer of `site`, or None if nothing was published yet."""
+    try:
+        with open(_pointer_path(root, site), encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+def _to_table(pa, df):
+    try:
+        return pa.Table.from_pandas(df, preserve_index=False)
+    except (pa.ArrowInvalid, pa.ArrowTypeError):
+        # mixed-type object columns (e.g. merged push rows): publish them as text
+        text = {c: "str" for c in df.columns if df[c].dtype == object}
+        return pa.Table.from_pandas(df.astype(text), preserve_index=False)
+
+
+def _write_atomic(path, write):
+    tmp = f"{path}.tmp"
+    write(tmp)
+    os.replace(tmp, path)
+
+
+def _write_pointer(root, site, pointer):
+    def write(path):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(pointer, f)
+    _write_atomic(_pointer_path(root, site), write)
+
+
+def pointer_age(pointer, now=None):
+    """Seconds since the worker last confirmed `pointer` (pointers of older workers never were)."""
+    now = time.time() if now is None else now
+    return now - pointer.get("checked_at", 0)
+
+
+def published_max_timestamp(pointer):
+    """The manifest's per-sheet max_timestamp as published with `pointer`."""
+    return {name: pd.Timestamp(ts) if ts else pd.NaT for name, ts in pointer["max_timestamp"].items()}
+
+
+def publish_snapshot(raw_dfs, manifest, site, root=SHARED_SNAPSHOT_DIR):
+    """
+    Clean `raw_dfs` and publish it (with its manifest) for `site`. Returns the pointer; an
+    unchanged snapshot (same hashes as the published one) only gets a new `checked_at`.
+    """
+    pa = _pyarrow()
+    now = time.time()
+    prev = read_pointer(site, root)
+    if prev is not None and prev.get("format") == _FORMAT and prev["hashes"] == manifest["hashes"]:
+        pointer = dict(prev, checked_at=now)
+        _write_pointer(root, site, pointer)
+        return pointer
+
+    os.makedirs(root, exist_ok=True)
+    seq = prev["seq"] + 1 if prev is not None else 1
+    files = {}
+    for name, df in clean_sheet_dfs(raw_dfs).items():
+        table = _to_table(pa, df)
+        files[name] = f"{site}-{seq}-{name}.arrow"
+
+        def write(path, table=table):
+            with pa.OSFile(path, "wb") as sink, pa.ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+        _write_atomic(os.path.join(root, files[name]), write)
+
+    pointer = {
+        "format": _FORMAT, "site": site, "seq": seq, "files": files, "hashes": manifest["hashes"],
+        "max_timestamp": {
+            name: None if pd.isna(ts) else ts.isoformat() for name, ts in manifest["max_timestamp"].items()
+        },
+        "published_at": now, "checked_at": now,
+    }
+    _write_pointer(root, site, pointer)
+    _prune(root, site, seq)
+    return pointer
+
+
+def _prune(root, site, seq):
+    for path in glob.glob(os.path.join(root, f"{site}-*-*.arrow")):
+        try:
+            file_seq = int(os.path.basename(path)[len(site) + 1:].split("-", 1)[0])
+        except ValueError:
+            continue
+        if file_seq <= seq - SHARED_SNAPSHOT_KEEP:
+            # readers that still map it keep their pages until they drop the frames
+            os.remove(path)
+
+
+def _int64_column(column):
+    """Int64 array over the mapped int64 buffer (pandas' own conversion copies it)."""
+    arr = column.chunk(0) if column.num_chunks == 1 else column.combine_chunks()
+    data = np.frombuffer(arr.buffers()[1], dtype=np.int64, count=len(arr), offset=arr.offset * 8)
+    return pd.arrays.IntegerArray(data, arr.is_null().to_numpy(zero_copy_only=False))
+
+
+def _map_frame(pa, path):
+    table = pa.ipc.open_file(pa.memory_map(path, "r")).read_all()
+    nullable = [
+        c["name"] for c in (table.schema.pandas_metadata or {}).get("columns", [])
+        if c["numpy_type"] == "Int64" and c["name"] in table.column_names
+    ]
+    text = (pa.string(), pa.large_string())
+    # Arrow strings -> pandas "str" backed by the mapped Arrow buffers (no copy)
+    str_dtype = pd.StringDtype("pyarrow", na_value=np.nan)
+    df = table.drop_columns(nullable).to_pandas(types_mapper=lambda t: str_dtype if t in text else None)
+    for name in nullable:
+        # through a Series: assigning the bare array would copy it
+        df[name] = pd.Series(_int64_column(table.column(name)), index=df.index, copy=False)
+    return df[table.column_names]
+
+
+def load_shared_snapshot(site, root=SHARED_SNAPSHOT_DIR, max_age=SHARED_SNAPSHOT_MAX_AGE_SECONDS):
+    """
+    (dfs, pointer) of the latest published snapshot of `site`, already cleaned (CleanedSheets);
+    (None, None) if there is none, (None, pointer) if it is older than `max_age` seconds.
+    """
+    pa = _pyarrow()
+    for _ in range(2):
+        pointer = read_pointer(site, root)
+        if pointer is None or pointer.get("format") != _FORMAT:
+            return None, None
+        age = pointer_age(pointer)
+        with _lock:
+            if age > max_age:
+                if (root, site) not in _stale:
+                    logger.warning("shared %s snapshot #%s is %.0fs old (snapshot_worker.py stalled?), "
+                                   "fetching the sheets locally", site, pointer["seq"], age)
+                    _stale.add((root, site))
+                return None, pointer
+            if (root, site) in _stale:
+                logger.info("shared %s snapshot is fresh again", site)
+                _stale.discard((root, site))
+            cached = _mapped.get((root, site))
+        if cached is not None and cached[0] == pointer["seq"]:
+            return cached[1], pointer
+        try:
+            dfs = CleanedSheets(
+                {name: _map_frame(pa, os.path.join(root, f)) for name, f in pointer["files"].items()})
+        except FileNotFoundError:
+            # pruned between reading the pointer and mapping: read the newer pointer
+            continue
+        with _lock:
+            _mapped[(root, site)] = (pointer["seq"], dfs)
+        return dfs, pointer
+    return None, None
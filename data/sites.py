@@ -0,0 +1,67 @@
+# data/sites.py
+"""
+Cross-site rollups for the multi-site overview (sites are defined in config.SITES).
+
+Each site's snapshot is fetched and processed on its own worker thread, under the
+site's timezone (through data/pipeline.Pipeline, sharing its stage cache with the
+dashboard), and reduced to one small row of headline numbers. Rows are
+memoized per site snapshot, so a session showing the overview only receives the
+rollups, never the other sites' raw events.
+"""
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+
+from config.config import SITES
+from data.pipeline import Pipeline
+from data.snapshot import memoize_stage, stage_key
+from utils.time_utils import now_local, epoch_to_local
+
+
+def _rollup(kpi, day):
+    """Headline numbers for one site's KPI frame on `day`."""
+    waiting = kpi["Arrival_Time"].notna() & kpi["Start_Loading_Time"].isna()
+    loading = kpi["Start_Loading_Time"].notna() & kpi["Completed_Time"].isna()
+    completed = kpi["Completed_Time"].notna()
+    last = kpi[["Arrival_Time", "Start_Loading_Time", "Completed_Time"]].max().max()
+    return {
+        "Date": day,
+        "Trucks": len(kpi),
+        "Waiting": int(waiting.sum()),
+        "Loading": int(loading.sum()),
+        "Completed": int(completed.sum()),
+        "Avg_Waiting_min": round(kpi["Waiting_min"].mean(), 1) if kpi["Waiting_min"].notna().any() else None,
+        "Avg_Loading_min": round(kpi["Loading_min"].mean(), 1) if kpi["Loading_min"].notna().any() else None,
+        "Last_event": None if pd.isna(last) else epoch_to_local(pd.Series([last], dtype="Int64")).iloc[0],
+    }
+
+
+def site_rollup(site):
+    """
+    Summarize today's trucks of `site` (runs in the caller's context). Goes through the
+    dashboard's Pipeline, so the site on screen reuses its memoized clean / kpi_index stages.
+    """
+    pipe = Pipeline(site)    # loads the snapshot, which also activates the site's timezone
+    manifest = pipe.manifest
+    day = now_local().date()
+    pipe.set_params(selected_date=day)
+    row = memoize_stage("site_rollup", stage_key(manifest, extra=(day,)), lambda: _rollup(pipe.get("kpi"), day))
+    return {"Site": site, "Name": SITES[site].get("name", site),
+            "Timezone": SITES[site]["timezone"], **row}
+
+
+def _safe_rollup(site):
+    try:
+        return site_rollup(site)
+    except Exception as e:
+        # one unreachable sheet must not hide the other sites
+        return {"Site": site, "Name": SITES[site].get("name", site),
+                "Timezone": SITES[site]["timezone"], "Error": f"{type(e).__name__}: {e}"}
+
+
+def all_site_rollups(sites=None):
+    """One rollup row per site, fetched and processed in parallel (one thread per site)."""
+    sites = list(sites or SITES)
+    with ThreadPoolExecutor(max_workers=max(1, len(sites))) as pool:
+        rows = list(pool.map(_safe_rollup, sites))
+    return pd.DataFrame(rows)
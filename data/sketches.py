@@ -0,0 +1,154 @@
+# data/sketches.py
+"""
+Mergeable quantile sketches for SLA percentiles (p50/p90/p95 of Waiting_min / Loading_min).
+
+QuantileSketch is a DDSketch-style log-bucket histogram: every value lands in bucket
+ceil(log_gamma(x)), quantiles come back within `relative_accuracy` of the true value,
+and two sketches merge by adding bucket counts. One sketch is kept per
+(day, Product_Group, direction, metric); weeks/months are answered by merging day sketches,
+so the cost of a window is O(days x buckets) instead of a sort over every visit.
+"""
+import math
+import threading
+from collections import defaultdict
+from datetime import timedelta
+
+import numpy as np
+import pandas as pd
+
+SLA_METRICS = ("Waiting_min", "Loading_min")
+SLA_QUANTILES = (0.5, 0.9, 0.95)
+
+
+class QuantileSketch:
+
+    def __init__(self, relative_accuracy=0.01):
+        self.relative_accuracy = relative_accuracy
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self.gamma)
+        self.bins = defaultdict(int)
+        self.zero_count = 0   # values <= 0 (bad clock order is clamped here)
+        self.count = 0
+
+    def add_many(self, values):
+        values = np.asarray(values, dtype=float)
+        values = values[~np.isnan(values)]
+        if values.size == 0:
+            return self
+        positive = values[values > 0]
+        self.zero_count += int(values.size - positive.size)
+        if positive.size:
+            idx, counts = np.unique(np.ceil(np.log(positive) / self._log_gamma).astype(int), return_counts=True)
+            for i, c in zip(idx.tolist(), counts.tolist()):
+                self.bins[i] += c
+        self.count += int(values.size)
+        return self
+
+    def add(self, value):
+        return self.add_many([value])
+
+    def merge(self, other):
+        if other.gamma != self.gamma:
+            raise ValueError("cannot merge sketches with different relative_accuracy")
+        for i, c in other.bins.items():
+            self.bins[i] += c
+        self.zero_count += other.zero_count
+        self.count += other.count
+        return self
+
+    def quantile(self, q):
+        if self.count == 0:
+            return np.nan
+        rank = q * (self.count - 1)
+        seen = self.zero_count
+        if rank < seen:
+            return 0.0
+        for i in sorted(self.bins):
+            seen += self.bins[i]
+            if rank < seen:
+                return 2 * self.gamma ** i / (self.gamma + 1)
+        return 2 * self.gamma ** max(self.bins) / (self.gamma + 1)
+
+    def copy(self):
+        out = QuantileSketch(self.relative_accuracy)
+        return out.merge(self)
+
+
+# (site, day) -> (fingerprint of that day's rows, {(Product_Group, Direction, metric): sketch})
+_day_cache = {}
+_lock = threading.Lock()
+
+
+def _day_sketches(site, day, rows):
+    fp = int(pd.util.hash_pandas_object(rows[list(SLA_METRICS) + ["Product_Group", "Direction"]], index=False).sum())
+    with _lock:
+        cached = _day_cache.get((site, day))
+        if cached is not None and cached[0] == fp:
+            return cached[1]
+
+    sketches = {}
+    for (prod, direction), grp in rows.groupby(["Product_Group", "Direction"]):
+        for metric in SLA_METRICS:
+            vals = grp[metric].dropna()
+            if not vals.empty:
+                sketches[(prod, direction, metric)] = QuantileSketch().add_many(vals.to_numpy())
+
+    with _lock:
+        _day_cache[(site, day)] = (fp, sketches)
+    return sketches
+
+
+def update_day_sketches(kpi, site=None):
+    """
+    kpi: per-truck KPI frame of `site` with Date, Product_Group, Direction and SLA_METRICS
+    columns. Rebuilds sketches only for days whose rows changed; returns {day: sketches}.
+    """
+    kpi = kpi.dropna(subset=["Date"])
+    kpi = kpi.assign(
+        Product_Group=kpi["Product_Group"].fillna("Unknown"),
+        Direction=kpi["Direction"].fillna("Unknown"),
+    )
+    return {day: _day_sketches(site, day, rows) for day, rows in kpi.groupby("Date")}
+
+
+def sla_day_sketches(kpi, trucks, site=None):
+    """update_day_sketches() for an unfiltered KPI frame; Direction comes from the truck dimension."""
+    kpi = kpi.join(trucks["Coming_to_Upload_or_Unload"].rename("Direction"), on="Truck_Plate_Number")
+    return update_day_sketches(kpi, site)
+
+
+def merge_window(day_sketches, start, end):
+    """Merge day sketches for start <= day <= end into {(Product_Group, Direction, metric): sketch}."""
+    merged = {}
+    for day, sketches in day_sketches.items():
+        if not (start <= day <= end):
+            continue
+        for key, sk in sketches.items():
+            if key in merged:
+                merged[key].merge(sk)
+            else:
+                merged[key] = sk.copy()
+    return merged
+
+
+def window_bounds(selected_date):
+    """(label, start, end) for today / this week (Mon-based) / this month, ending at selected_date."""
+    week_start = selected_date - timedelta(days=selected_date.weekday())
+    month_start = selected_date.replace(day=1)
+    return [
+        ("Today", selected_date, selected_date),
+        ("This week", week_start, selected_date),
+        ("This month", month_start, selected_date),
+    ]
+
+
+def percentile_table(merged):
+    """Flatten merged sketches into one row per (Product_Group, Direction, metric)."""
+    rows = []
+    for (prod, direction, metric), sk in merged.items():
+        row = {"Product_Group": prod, "Direction": direction, "Metric": metric, "Count": sk.count}
+        for q in SLA_QUANTILES:
+            row[f"p{int(q * 100)}"] = sk.quantile(q)
+        rows.append(row)
+    cols = ["Product_Group", "Direction", "Metric", "Count"] + [f"p{int(q * 100)}" for q in SLA_QUANTILES]
+    return pd.DataFrame(rows, columns=cols)
@@ -0,0 +1,128 @@
+# data/snapshot.py
+import hashlib
+import threading
+
+import pandas as pd
+
+SHEET_NAMES = ("security", "driver", "status", "logistic")
+
+# process-wide state: last manifest per site + memoized stage results
+_lock = threading.Lock()
+_state = {}     # site -> {"version": int, "manifest": dict}
+_stage_cache = {}
+_MAX_ENTRIES_PER_STAGE = 8
+
+
+def sheet_hash(df):
+    """Content hash of a raw sheet (columns + every cell, order-sensitive)."""
+    if df is None:
+        return "none"
+    h = hashlib.sha1()
+    h.update("|".join(map(str, df.columns)).encode("utf-8"))
+    if not df.empty:
+        h.update(pd.util.hash_pandas_object(df, index=False).values.tobytes())
+    return h.hexdigest()
+
+
+def _max_timestamp(df):
+    if df is None or "Timestamp" not in df.columns:
+        return pd.NaT
+    s = pd.to_datetime(df["Timestamp"], errors="coerce").dropna()
+    return s.max() if not s.empty else pd.NaT
+
+
+def build_manifest(raw_dfs: dict, site=None, hashes=None, max_timestamp=None):
+    """
+    Build the manifest for a freshly loaded snapshot of `site` (`hashes` / `max_timestamp`:
+    per-sheet values computed by whoever published the frames, see data/shared_snapshot.py):
+      - site:          site id (versions are tracked per site)
+      - hashes:        per-sheet content hash
+      - rows:          per-sheet row count
+      - max_timestamp: per-sheet max parsed Timestamp (only re-parsed when that sheet changed)
+      - version:       monotonic, bumped only when at least one hash changed
+    """
+    with _lock:
+        state = _state.setdefault(site, {"version": 0, "manifest": None})
+        prev = state["manifest"]
+        given, given_ts, hashes, rows, max_ts = hashes, max_timestamp, {}, {}, {}
+        for name, df in raw_dfs.items():
+            h = given[name] if given is not None else sheet_hash(df)
+            hashes[name] = h
+            rows[name] = 0 if df is None else len(df)
+            if given_ts is not None:
+                max_ts[name] = given_ts[name]
+            elif prev is not None and prev["hashes"].get(name) == h:
+                max_ts[name] = prev["max_timestamp"][name]
+            else:
+                max_ts[name] = _max_timestamp(df)
+
+        if prev is None or prev["hashes"] != hashes:
+            state["version"] += 1
+            manifest = {
+                "site": site,
+                "version": state["version"],
+                "hashes": hashes,
+                "rows": rows,
+                "max_timestamp": max_ts,
+            }
+            state["manifest"] = manifest
+        else:
+            manifest = prev
+        return manifest
+
+
+def snapshot_date(manifest):
+    """Latest date seen across all sheets (falls back to today)."""
+    dates = [ts.date() for ts in manifest["max_timestamp"].values() if pd.notna(ts)]
+    if dates:
+        return max(dates)
+    return pd.to_datetime("today").date()
+
+
+def stage_key(manifest, sheets=SHEET_NAMES, extra=()):
+    """
+    Cache key for a stage: the site (always first, memoize_stage evicts by it), the hashes
+    of the sheets it reads and any extra arguments.
+    """
+    return (manifest.get("site"),) + tuple(manifest["hashes"].get(s) for s in sheets) + tuple(extra)
+
+
+def memoize_stage(name, key, compute):
+    """
+    Return the last result of stage `name` if it was computed for the same `key`,
+    otherwise run `compute()` and remember it. Each entry is stamped with its site's
+    snapshot version (re-stamped on a hit, since a stage that doesn't read the changed
+    sheet keeps its key); storing a result drops the stage's entries of the same site
+    from older versions, and at most _MAX_ENTRIES_PER_STAGE entries are kept per site
+    so filter combinations don't grow unbounded.
+    """
+    site = key[0]
+    with _lock:
+        entries = _stage_cache.setdefault(name, {})
+        if key in entries:
+            version = _state.get(site, {}).get("version", 0)
+            result = entries.pop(key)[1]
+            entries[key] = (version, result)
+            return result
+    result = compute()
+    with _lock:
+        version = _state.get(site, {}).get("version", 0)
+        entries = _stage_cache.setdefault(name, {})
+        entries.pop(key, None)
+        same_site = []
+        for k, (v, _) in list(entries.items()):
+            if k[0] != site:
+                continue
+            if v < version:
+                del entries[k]
+            else:
+                same_site.append(k)
+        for k in same_site[:max(0, len(same_site) - _MAX_ENTRIES_PER_STAGE + 1)]:
+            del entries[k]
+        entries[key] = (version, result)
+    return result
+
+
+def clear_stage_cache():
+    with _lock:
+        _stage_cache.clear()
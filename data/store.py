@@ -0,0 +1,271 @@
+# data/store.py
+"""
+Optional embedded SQLite event store for cleaned sheet rows.
+
+Every cleaned security/status/driver/logistic row is stored once, keyed by
+(ts, plate, row_hash), so re-ingesting the same export is a no-op. A per-sheet
+high-water mark (table `ingested`) limits each new snapshot to its appended rows; a sheet
+whose rows below the mark changed replaces its stored rows. Indexes:
+
+    idx_events_plate_status_ts   (plate, status, ts)
+    idx_events_date_product      (date, product)
+
+A selected day is answered by index scans: find the plates with events on that day,
+then pull only those plates' events, and run the normal per-truck / waiting / summary
+logic on them instead of reloading the whole sheet history.
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+
+import numpy as np
+import pandas as pd
+
+from config.config import EVENT_STORE_PATH, DEFAULT_SITE
+from data.metrics import compute_per_truck_metrics
+from utils.time_utils import to_epoch_ns, epoch_local_date
+
+SHEETS = ("security", "driver", "status", "logistic")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS events (
+    ts        INTEGER NOT NULL,      -- UTC epoch ns
+    plate     TEXT    NOT NULL,
+    row_hash  TEXT    NOT NULL,
+    sheet     TEXT    NOT NULL,
+    date      TEXT    NOT NULL,      -- LOCAL_TZ date (ISO)
+    status    TEXT,
+    product   TEXT,
+    direction TEXT,
+    payload   TEXT    NOT NULL,      -- full cleaned row as JSON
+    seq       INTEGER,               -- row position in its sheet (the fold is row-order sensitive)
+    PRIMARY KEY (ts, plate, row_hash)
+);
+CREATE INDEX IF NOT EXISTS idx_events_plate_status_ts ON events (plate, status, ts);
+CREATE INDEX IF NOT EXISTS idx_events_date_product ON events (date, product);
+CREATE TABLE IF NOT EXISTS ingested (
+    sheet       TEXT PRIMARY KEY,
+    source_hash TEXT,              -- manifest hash of the sheet last ingested
+    rows        INTEGER NOT NULL,  -- high-water mark: cleaned rows ingested so far
+    prefix_hash TEXT NOT NULL      -- digest of those rows, to notice edits below the mark
+);
+"""
+
+
+def _json_value(v):
+    if v is None or v is pd.NA or (isinstance(v, float) and np.isnan(v)):
+        return None
+    if isinstance(v, np.generic):
+        return v.item()
+    return v
+
+
+class EventStore:
+
+    def __init__(self, path=EVENT_STORE_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(_SCHEMA)
+        if "seq" not in {r[1] for r in self._conn.execute("PRAGMA table_info(events)")}:
+            # stores created before rows kept their sheet position; those rows sort by ts
+            self._conn.execute("ALTER TABLE events ADD COLUMN seq INTEGER")
+
+    def close(self):
+        self._conn.close()
+
+    # ---------------- ingestion ----------------
+
+    def ingest_frames(self, dfs: dict, hashes=None) -> int:
+        """
+        Insert new cleaned rows (Timestamp as epoch ns). Rows without Timestamp or plate are
+        skipped. Returns the number of newly inserted rows.
+
+        Sheets are append-only, so only rows past each sheet's high-water mark are converted.
+        A sheet whose manifest hash (`hashes`) is the one last ingested is skipped outright.
+        If rows below the mark changed (edited/deleted rows, or pushed rows the export has
+        since replaced), the sheet's stored rows are deleted and it is re-read in full.
+        """
+        with self._lock:
+            marks = {r[0]: r[1:] for r in self._conn.execute("SELECT sheet, source_hash, rows, prefix_hash FROM ingested")}
+        records, new_marks, replaced = [], [], []
+        for sheet in SHEETS:
+            df = dfs.get(sheet)
+            if df is None or "Timestamp" not in df.columns or "Truck_Plate_Number" not in df.columns:
+                continue
+            source_hash = hashes.get(sheet) if hashes else None
+            mark = marks.get(sheet)
+            if mark is not None and source_hash is not None and mark[0] == source_hash:
+                continue
+
+            row_hashes = pd.util.hash_pandas_object(df, index=False).to_numpy()
+            start = 0
+            if mark is not None and len(df) >= mark[1] and _digest(df, row_hashes[:mark[1]]) == mark[2]:
+                start = mark[1]
+            else:
+                replaced.append((sheet,))
+            records.extend(self._records(sheet, df.iloc[start:]))
+            new_marks.append((sheet, source_hash, len(df), _digest(df, row_hashes)))
+
+        with self._lock, self._conn:
+            self._conn.executemany("DELETE FROM events WHERE sheet = ?", replaced)
+            before = self._conn.total_changes
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO events (ts, plate, row_hash, sheet, date, status, product, direction, payload, seq) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", records)
+            inserted = self._conn.total_changes - before
+            self._conn.executemany("INSERT OR REPLACE INTO ingested VALUES (?, ?, ?, ?)", new_marks)
+            return inserted
+
+    @staticmethod
+    def _records(sheet, df):
+        df = df[df["Timestamp"].notna() & df["Truck_Plate_Number"].notna()]
+        if df.empty:
+            return []
+        records = []
+        dates = epoch_local_date(df["Timestamp"]).astype(str).to_numpy()
+        cols = list(df.columns)
+        for seq, row, date in zip(df.index, df.itertuples(index=False, name=None), dates):
+            rec = {c: _json_value(v) for c, v in zip(cols, row)}
+            payload = json.dumps(rec, ensure_ascii=False, sort_keys=True)
+            records.append((
+                int(rec["Timestamp"]),
+                str(rec["Truck_Plate_Number"]),
+                hashlib.sha1(f"{sheet}|{payload}".encode("utf-8")).hexdigest(),
+                sheet,
+                date,
+                rec.get("Status"),
+                rec.get("Product_Group"),
+                rec.get("Coming_to_Upload_or_Unload"),
+                payload,
+                int(seq),
+            ))
+        return records
+
+    # ---------------- queries ----------------
+
+    def _query(self, sql, params=()):
+        with self._lock:
+            return self._conn.execute(sql, params).fetchall()
+
+    def plates_on(self, day):
+        """Plates with any event on `day` (date index range scan)."""
+        rows = self._query("SELECT DISTINCT plate FROM events WHERE date = ?", (str(day),))
+        return [r[0] for r in rows]
+
+    def frames_for_plates(self, plates):
+        """Cleaned-shape frames holding every stored event of `plates` (plate index scans), in sheet order."""
+        by_sheet = {s: [] for s in SHEETS}
+        for i in range(0, len(plates), 500):
+            chunk = plates[i:i + 500]
+            marks = ",".join("?" * len(chunk))
+            for sheet, payload, seq, ts in self._query(
+                f"SELECT sheet, payload, seq, ts FROM events WHERE plate IN ({marks})", tuple(chunk)
+            ):
+                # legacy rows without seq first, by ts
+                by_sheet[sheet].append(((seq is not None, seq or 0, ts), payload))
+        out = {}
+        for sheet, rows in by_sheet.items():
+            df = pd.DataFrame([json.loads(payload) for _, payload in sorted(rows, key=lambda r: r[0])])
+            if "Timestamp" in df.columns:
+                df["Timestamp"] = to_epoch_ns(df["Timestamp"].astype("int64"))
+            for col in ("Truck_Plate_Number", "Timestamp", "Product_Group", "Status",
+                        "Coming_to_Upload_or_Unload", "Driver_Name", "Phone_Number"):
+                if col not in df.columns and _sheet_has(sheet, col):
+                    df[col] = pd.Series(dtype="Int64" if col == "Timestamp" else object)
+            out[sheet] = df
+        return out
+
+    def day_frames(self, day):
+        """
+        Frames with the full event history of every truck active on `day`: a superset of the
+        plates whose first Arrival is on `day`, so filtering the fold on Date == day gives the
+        dashboard's rows (see data/export.py).
+        """
+        return self.frames_for_plates(self.plates_on(day))
+
+    def per_truck_metrics(self, day, product_filter=None, upload_type=None):
+        dfs = self.day_frames(day)
+        return compute_per_truck_metrics(
+            dfs['security'], dfs['status'], dfs['logistic'], dfs['driver'],
+            selected_date=day, product_filter=product_filter, upload_type=upload_type
+        )
+
+    def waiting_trucks(self, day=None):
+        """Plates with an Arrival but no Start_Loading yet: (plate, arrival_ts, product)."""
+        sql = """
+            SELECT a.plate, MIN(a.ts) AS arrival_ts, MIN(a.product) AS product
+            FROM events a
+            WHERE a.sheet = 'status' AND a.status = 'Arrival'
+              AND NOT EXISTS (
+                  SELECT 1 FROM events s
+                  WHERE s.plate = a.plate AND s.status = 'Start_Loading' AND s.sheet = 'status'
+              )
+            GROUP BY a.plate
+        """
+        df = pd.DataFrame(self._query(sql), columns=["Truck_Plate_Number", "Arrival_Time", "Product_Group"])
+        df["Arrival_Time"] = df["Arrival_Time"].astype("Int64")
+        if day is not None:
+            df = df[epoch_local_date(df["Arrival_Time"]) == day]
+        return df
+
+    def status_counts(self, day, product_filter=None):
+        """
+        Latest status per plate whose latest status event falls on `day` -> {status: count}.
+        Events sharing the latest ts count once: the later sheet row wins.
+        """
+        sql = """
+            SELECT status, COUNT(*) FROM (
+                SELECT status, date, product,
+                       ROW_NUMBER() OVER (PARTITION BY plate ORDER BY ts DESC, seq DESC, rowid DESC) AS rn
+                FROM events WHERE sheet = 'status'
+            ) e
+            WHERE e.rn = 1 AND e.date = ?
+        """
+        params = [str(day)]
+        if product_filter:
+            sql += f" AND e.product IN ({','.join('?' * len(product_filter))})"
+            params += list(product_filter)
+        sql += " GROUP BY e.status"
+        return dict(self._query(sql, tuple(params)))
+
+
+def _digest(df, row_hashes):
+    """Digest of a sheet's columns + the given leading row hashes (hash_pandas_object)."""
+    h = hashlib.sha1("|".join(map(str, df.columns)).encode("utf-8"))
+    h.update(row_hashes.tobytes())
+    return h.hexdigest()
+
+
+def _sheet_has(sheet, col):
+    base = {"Truck_Plate_Number", "Timestamp"}
+    extra = {
+        'status': {"Product_Group", "Status"},
+        'logistic': {"Product_Group"},
+        'security': {"Coming_to_Upload_or_Unload"},
+        'driver': {"Driver_Name", "Phone_Number"},
+    }
+    return col in base | extra[sheet]
+
+
+_stores = {}
+_store_lock = threading.Lock()
+
+
+def get_event_store(site=None):
+    """
+    Process-wide EventStore per site: EVENT_STORE_PATH for the default site,
+    "<root>.<site><ext>" next to it for the others.
+    """
+    site = site or DEFAULT_SITE
+    with _store_lock:
+        if site not in _stores:
+            path = EVENT_STORE_PATH
+            if site != DEFAULT_SITE:
+                root, ext = os.path.splitext(EVENT_STORE_PATH)
+                path = f"{root}.{site}{ext}"
+            _stores[site] = EventStore(path)
+        return _stores[site]
@@ -0,0 +1,214 @@
+# data/timeseries.py
+"""
+Yard activity time series with a fixed point budget (CHART_POINT_BUDGET per series).
+
+    waiting    trucks waiting over time: +1 at Arrival, -1 at Start_Loading (or
+               ALERT_MAX_AGE_HOURS later if the visit never starts); a visit that
+               hasn't started yet is still waiting at `now`, where the series ends
+    arrivals   arrivals per hour
+    median     rolling median Waiting_min per Product_Group (by Start_Loading time)
+
+Waiting and arrivals come from CHART_BUCKET_MINUTES buckets aggregated per local day and
+cached by a fingerprint of that day's visits, so a multi-week range only recomputes the
+days that changed. Each bucket keeps its net change and its peak/trough, so min-max
+decimation over any number of buckets is exact. The median series is thinned with LTTB.
+The payload therefore stays the same size however long the range is.
+"""
+import math
+import threading
+from datetime import timedelta
+
+import numpy as np
+import pandas as pd
+
+from config.config import CHART_POINT_BUDGET, CHART_BUCKET_MINUTES, ALERT_MAX_AGE_HOURS
+from utils.time_utils import local_day_start_ns, epoch_to_local, NS_PER_MIN
+
+BUCKET_NS = CHART_BUCKET_MINUTES * NS_PER_MIN
+_BUCKETS_PER_HOUR = max(1, 60 // CHART_BUCKET_MINUTES)
+
+# (site, day, local midnight ns, selection) -> ((day end, fingerprint of the day's visits), bucket arrays)
+_day_cache = {}
+_lock = threading.Lock()
+_MAX_CACHED_DAYS = 2000
+
+
+def visit_intervals(kpi, trucks):
+    """
+    One row per visit: Arrival (ns), End (ns; Start_Loading, else Arrival + ALERT_MAX_AGE_HOURS),
+    Start (ns or NA), Waiting_min, Product_Group and Direction (truck dimension).
+    """
+    v = kpi[kpi["Arrival_Time"].notna()]
+    v = v.join(trucks["Coming_to_Upload_or_Unload"].rename("Direction"), on="Truck_Plate_Number")
+    arrival = v["Arrival_Time"].astype("int64").to_numpy()
+    start = v["Start_Loading_Time"]
+    max_age = ALERT_MAX_AGE_HOURS * 60 * NS_PER_MIN
+    end = np.where(start.isna().to_numpy(), arrival + max_age, start.fillna(0).astype("int64").to_numpy())
+    return pd.DataFrame({
+        "Arrival": arrival,
+        "End": np.maximum(end, arrival),
+        "Start": start.to_numpy(),
+        "Waiting_min": v["Waiting_min"].to_numpy(),
+        "Product_Group": v["Product_Group"].fillna("Unknown").to_numpy(),
+        "Direction": v["Direction"].fillna("Unknown").to_numpy(),
+    })
+
+
+def select_visits(visits, product_filter=None, upload_type=None):
+    if product_filter:
+        visits = visits[visits["Product_Group"].isin(product_filter)]
+    if upload_type:
+        visits = visits[visits["Direction"] == upload_type]
+    return visits
+
+
+def _bucketize(lo, hi, visits):
+    """Bucket arrays for [lo, hi): arrivals, net change, peak/trough relative to the bucket start."""
+    n = math.ceil((hi - lo) / BUCKET_NS)
+    arr = visits["Arrival"].to_numpy()
+    end = visits["End"].to_numpy()
+    arr = arr[(arr >= lo) & (arr < hi)]
+    end = end[(end >= lo) & (end < hi)]
+
+    t = np.concatenate([end, arr])
+    d = np.concatenate([np.full(len(end), -1), np.full(len(arr), 1)])
+    order = np.lexsort((d, t))      # same instant: departures before arrivals
+    t, d = t[order], d[order]
+    idx = (t - lo) // BUCKET_NS
+
+    net = np.bincount(idx, weights=d, minlength=n).astype(int)
+    offset = np.concatenate([[0], np.cumsum(net)[:-1]])           # level change before each bucket
+    level = np.cumsum(d) - offset[idx] if len(d) else np.array([], dtype=int)
+    peak = np.zeros(n, dtype=int)
+    trough = np.zeros(n, dtype=int)
+    np.maximum.at(peak, idx, level)
+    np.minimum.at(trough, idx, level)
+    return {
+        "arrivals": np.bincount((arr - lo) // BUCKET_NS, minlength=n),
+        "net": net, "peak": peak, "trough": trough,
+    }
+
+
+def _day_buckets(site, day, visits, selection, now=None):
+    lo = local_day_start_ns(day)
+    hi = local_day_start_ns(day + timedelta(days=1))
+    if now is not None:
+        hi = min(hi, now)
+    touching = visits[((visits["Arrival"] >= lo) & (visits["Arrival"] < hi)) | ((visits["End"] >= lo) & (visits["End"] < hi))]
+    # the day's end is part of the fingerprint: today grows as `now` moves
+    fp = (hi, int(pd.util.hash_pandas_object(touching[["Arrival", "End"]], index=False).sum()))
+    key = (site, day, lo, selection)
+    with _lock:
+        cached = _day_cache.get(key)
+        if cached is not None and cached[0] == fp:
+            return cached[1]
+
+    buckets = {"start": lo, **_bucketize(lo, hi, touching)}
+    with _lock:
+        if len(_day_cache) >= _MAX_CACHED_DAYS:
+            _day_cache.pop(next(iter(_day_cache)))
+        _day_cache[key] = (fp, buckets)
+    return buckets
+
+
+def _minmax(times, low, high, budget):
+    """Min-max decimation: per bin of buckets keep the lowest and highest value, in time order."""
+    n = len(times)
+    if n <= budget:
+        return times, high
+    bins = max(1, budget // 2)
+    edges = np.linspace(0, n, bins + 1).astype(int)
+    out_t, out_v = [], []
+    for a, b in zip(edges[:-1], edges[1:]):
+        if a == b:
+            continue
+        i, j = a + int(np.argmin(low[a:b])), a + int(np.argmax(high[a:b]))
+        for k, v in sorted(((i, low[i]), (j, high[j]))):
+            out_t.append(times[k])
+            out_v.append(v)
+    return np.array(out_t), np.array(out_v)
+
+
+def lttb(x, y, budget):
+    """Largest-Triangle-Three-Buckets downsampling of (x, y) to at most `budget` points."""
+    n = len(x)
+    if n <= budget or budget < 3:
+        return x, y
+    xf = x.astype("float64")
+    every = (n - 2) / (budget - 2)
+    keep, a = [0], 0
+    for i in range(budget - 2):
+        lo = int(i * every) + 1
+        hi = int((i + 1) * every) + 1
+        nxt_hi = min(int((i + 2) * every) + 1, n)
+        cx, cy = (xf[hi:nxt_hi].mean(), y[hi:nxt_hi].mean()) if hi < nxt_hi else (xf[-1], y[-1])
+        # keep the point of this bucket forming the largest triangle with the last kept point
+        # and the average of the next bucket
+        area = np.abs((xf[a] - cx) * (y[lo:hi] - y[a]) - (xf[a] - xf[lo:hi]) * (cy - y[a]))
+        a = lo + int(np.argmax(area))
+        keep.append(a)
+    keep.append(n - 1)
+    return x[keep], y[keep]
+
+
+def activity_series(visits, start_day, end_day, product_filter=None, upload_type=None,
+                    budget=CHART_POINT_BUDGET, median_window="60min", now=None, site=None):
+    """
+    Downsampled series of `site` for local days [start_day, end_day], cut at `now` (epoch ns:
+    the current time, or the as-of time when time travel is active; None if the range starts
+    after it). Visits not started by `now` end there instead of ALERT_MAX_AGE_HOURS after
+    their arrival, so waiting trucks don't show up in buckets that haven't happened yet.
+    Times are epoch ns:
+      waiting:  (times, trucks waiting)            min-max decimated to `budget`
+      arrivals: (bin starts, arrivals per hour)    re-binned to whole hours, <= `budget` bins
+      median:   {Product_Group: (times, minutes)}  rolling median, LTTB to `budget` per group
+    """
+    selection = (tuple(sorted(product_filter)) if product_filter else None, upload_type)
+    visits = select_visits(visits, product_filter, upload_type)
+
+    days = [start_day + timedelta(days=i) for i in range((end_day - start_day).days + 1)]
+    if now is not None:
+        visits = visits.assign(End=np.minimum(visits["End"].to_numpy(), now))
+        days = [day for day in days if local_day_start_ns(day) < now]
+        if not days:
+            return None
+    per_day = [_day_buckets(site, day, visits, selection, now) for day in days]
+    lo = per_day[0]["start"]
+
+    times = np.concatenate([b["start"] + np.arange(len(b["net"])) * BUCKET_NS for b in per_day])
+    net = np.concatenate([b["net"] for b in per_day])
+    initial = int(((visits["Arrival"] < lo) & (visits["End"] >= lo)).sum())
+    level = initial + np.concatenate([[0], np.cumsum(net)[:-1]])
+    peak = level + np.concatenate([b["peak"] for b in per_day])
+    trough = level + np.concatenate([b["trough"] for b in per_day])
+    waiting = _minmax(times, trough, peak, budget)
+
+    arrivals = np.concatenate([b["arrivals"] for b in per_day])
+    width = _BUCKETS_PER_HOUR * max(1, math.ceil(len(arrivals) / (_BUCKETS_PER_HOUR * budget)))
+    pad = (-len(arrivals)) % width
+    counts = np.concatenate([arrivals, np.zeros(pad, dtype=int)]).reshape(-1, width).sum(axis=1)
+    rate = counts / (width * CHART_BUCKET_MINUTES / 60)
+    arrivals_series = (times[::width], rate)
+
+    hi = local_day_start_ns(end_day + timedelta(days=1))
+    if now is not None:
+        hi = min(hi, now)
+    started = visits[visits["Start"].notna()]
+    started = started[(started["Start"].astype("int64") >= lo) & (started["Start"].astype("int64") < hi)]
+    median = {}
+    groups = started.groupby("Product_Group")
+    per_group = max(3, budget // max(1, groups.ngroups))
+    for product, grp in groups:
+        grp = grp.sort_values("Start")
+        s = pd.Series(grp["Waiting_min"].to_numpy(),
+                      index=pd.to_datetime(grp["Start"].astype("int64").to_numpy(), unit="ns"))
+        rolled = s.rolling(median_window).median()
+        x = grp["Start"].astype("int64").to_numpy()
+        median[product] = lttb(x, rolled.to_numpy(), per_group)
+
+    return {"waiting": waiting, "arrivals": arrivals_series, "median": median}
+
+
+def to_local(times):
+    """Epoch ns array -> tz-aware local datetimes for plotting."""
+    return epoch_to_local(pd.Series(times, dtype="Int64")).to_numpy()
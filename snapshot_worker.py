@@ -0,0 +1,55 @@
+# snapshot_worker.py
+"""
+Snapshot publisher for multi-process deployments. Fetches every site's sheets (adaptive
+per-sheet polling, data/loader.py) and publishes each new snapshot, cleaned, to
+SHARED_SNAPSHOT_DIR (data/shared_snapshot.py). The app replicas behind the proxy then only
+memory-map it, so upstream fetches, CSV parsing and cleaning happen once per deployment
+instead of once per replica. Every pass also refreshes the pointers' checked_at; replicas
+fetch for themselves once it is older than SHARED_SNAPSHOT_MAX_AGE_SECONDS, so keep
+--interval well below that.
+
+    SHARED_SNAPSHOT_DIR=/dev/shm/truck python snapshot_worker.py
+    SHARED_SNAPSHOT_DIR=/dev/shm/truck python snapshot_worker.py --once
+
+Run the apps with the same SHARED_SNAPSHOT_DIR. With INGEST_ENABLED the push endpoint
+lives here as well (pushed rows are part of the published snapshot).
+"""
+import argparse
+import logging
+import time
+
+from config.config import SITES, SHARED_SNAPSHOT_DIR, SNAPSHOT_WORKER_SECONDS
+from data.loader import fetch_snapshot
+from data.shared_snapshot import publish_snapshot, read_pointer
+
+logger = logging.getLogger("snapshot_worker")
+
+
+def run(once=False, interval=SNAPSHOT_WORKER_SECONDS, root=SHARED_SNAPSHOT_DIR):
+    published = {site: (read_pointer(site, root) or {}).get("seq") for site in SITES}
+    while True:
+        for site in SITES:
+            try:
+                raw_dfs, manifest = fetch_snapshot(site)
+                pointer = publish_snapshot(raw_dfs, manifest, site, root)
+                if published.get(site) != pointer["seq"]:
+                    logger.info("published %s snapshot %s", site, pointer["seq"])
+                    published[site] = pointer["seq"]
+            except Exception:
+                logger.exception("publishing %s failed", site)
+
+        if once:
+            return
+        time.sleep(interval)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Publish sheet snapshots for the app replicas")
+    parser.add_argument("--once", action="store_true")
+    parser.add_argument("--interval", type=int, default=SNAPSHOT_WORKER_SECONDS)
+    parser.add_argument("--dir", default=SHARED_SNAPSHOT_DIR)
+    args = parser.parse_args()
+    if not args.dir:
+        parser.error("set SHARED_SNAPSHOT_DIR (or --dir)")
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    run(once=args.once, interval=args.interval, root=args.dir)
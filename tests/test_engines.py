@@ -0,0 +1,141 @@
+# tests/test_engines.py
+"""
+Equivalence checks for the per-truck KPI core on messy sheets:
+
+    pandas engine == polars engine                          (data/engines.py)
+    as-of index at t == recompute on the rows up to t       (data/asof.py)
+    KpiFilterIndex.select == compute_per_truck_metrics(filters)   (data/filters.py)
+
+    python -m pytest -q
+"""
+from datetime import date, timedelta
+
+import numpy as np
+import pandas as pd
+import pytest
+from pandas.testing import assert_frame_equal
+
+from config.config import ASOF_CHECKPOINT_MINUTES
+from data.asof import AsOfIndex
+from data.engines import get_engine
+from data.filters import KpiFilterIndex
+from data.metrics import compute_per_truck_metrics
+from data.processor import clean_sheet_dfs
+from utils.time_utils import local_day_start_ns, NS_PER_MIN
+
+DAYS = [date(2026, 10, 1), date(2026, 10, 2), date(2026, 10, 3)]
+PRODUCTS = ["Pipe", "Coil", "Roofing"]
+
+
+def _fmt(ts):
+    return ts.strftime("%m/%d/%Y %H:%M:%S")
+
+
+def messy_frames(seed=0, n_trucks=120):
+    """
+    Cleaned sheets with what the real ones contain: null products (some only known from
+    logistic), security/driver-only plates, Completed without a start or before it,
+    unparseable and empty timestamps, plates missing from some sheets, null plates and
+    plates coming back on a later day.
+    """
+    rng = np.random.default_rng(seed)
+    security, driver, status, logistic = [], [], [], []
+    for i in range(n_trucks):
+        plate = f"P{i % (n_trucks - 15)}"  # the last 15 trucks revisit earlier plates
+        arrival = pd.Timestamp(DAYS[i % len(DAYS)]) + pd.Timedelta(minutes=int(rng.integers(5 * 60, 20 * 60)))
+        start = arrival + pd.Timedelta(minutes=int(rng.integers(0, 90)))
+        completed = start + pd.Timedelta(minutes=int(rng.integers(5, 120)))
+        product = PRODUCTS[int(rng.integers(len(PRODUCTS)))] if rng.random() > 0.15 else None
+
+        def ts(t):
+            r = rng.random()
+            return "not a date" if r < 0.03 else ("" if r < 0.05 else _fmt(t))
+
+        if rng.random() > 0.1:
+            status.append({"Timestamp": ts(arrival), "Truck_Plate_Number": plate,
+                           "Product_Group": product, "Status": "Arrival"})
+        if rng.random() > 0.2:
+            status.append({"Timestamp": ts(start), "Truck_Plate_Number": plate,
+                           "Product_Group": product, "Status": "Start_Loading"})
+        if rng.random() < 0.1:
+            # a Completed scanned before the start
+            status.append({"Timestamp": ts(start - pd.Timedelta(minutes=3)), "Truck_Plate_Number": plate,
+                           "Product_Group": None, "Status": "Completed"})
+        if rng.random() > 0.15:
+            status.append({"Timestamp": ts(completed), "Truck_Plate_Number": plate,
+                           "Product_Group": product, "Status": "Completed"})
+        if rng.random() > 0.3:
+            logistic.append({"Timestamp": ts(completed), "Product_Group": PRODUCTS[i % len(PRODUCTS)],
+                             "Truck_Plate_Number": plate, "Total_Weight_MT": float(rng.integers(5, 30)),
+                             "Outbound_Delivery_No": f"OD{i}"})
+        if rng.random() > 0.2:
+            security.append({"Timestamp": ts(arrival - pd.Timedelta(minutes=5)), "Truck_Plate_Number": plate,
+                             "Truck_Load_Capacity_by_Security": 10, "Scan_In_or_Out": "Gate_in",
+                             "Coming_to_Upload_or_Unload": "Uploading" if rng.random() < 0.5 else "Unloading"})
+        if rng.random() > 0.3:
+            driver.append({"Timestamp": ts(arrival - pd.Timedelta(minutes=10)), "Driver_Name": f"D{i}",
+                           "Truck_Plate_Number": plate, "Phone_Number": "012",
+                           "Truck_Load_Capacity_by_Driver": 10})
+
+    for j, day in enumerate(DAYS):
+        noon = _fmt(pd.Timestamp(day) + pd.Timedelta(hours=12))
+        security.append({"Timestamp": noon, "Truck_Plate_Number": f"S{j}", "Truck_Load_Capacity_by_Security": 10,
+                         "Scan_In_or_Out": "Gate_in", "Coming_to_Upload_or_Unload": "Unloading"})
+        driver.append({"Timestamp": noon, "Driver_Name": "nobody", "Truck_Plate_Number": f"D{j}",
+                       "Phone_Number": "012", "Truck_Load_Capacity_by_Driver": 10})
+        status.append({"Timestamp": noon, "Truck_Plate_Number": None, "Product_Group": "Pipe", "Status": "Arrival"})
+        logistic.append({"Timestamp": noon, "Product_Group": "Coil", "Truck_Plate_Number": f"L{j}",
+                         "Total_Weight_MT": 12.0, "Outbound_Delivery_No": f"ODL{j}"})
+
+    return clean_sheet_dfs({
+        "security": pd.DataFrame(security),
+        "driver": pd.DataFrame(driver),
+        "status": pd.DataFrame(status),
+        "logistic": pd.DataFrame(logistic),
+    })
+
+
+def _args(dfs):
+    # compute_per_truck_metrics writes the parsed Timestamp back into its inputs
+    return [dfs[name].copy() for name in ("security", "status", "logistic", "driver")]
+
+
+@pytest.mark.parametrize("seed", [0, 1, 2])
+def test_polars_engine_matches_pandas(seed):
+    pytest.importorskip("polars")
+    dfs = messy_frames(seed)
+    expected = get_engine("pandas").per_truck_core(*_args(dfs))
+    assert_frame_equal(get_engine("polars").per_truck_core(*_args(dfs)), expected)
+    assert_frame_equal(
+        compute_per_truck_metrics(*_args(dfs), selected_date=DAYS[1], engine="polars"),
+        compute_per_truck_metrics(*_args(dfs), selected_date=DAYS[1], engine="pandas"),
+    )
+
+
+@pytest.mark.parametrize("seed", [0, 1])
+def test_asof_index_matches_recompute(seed):
+    dfs = messy_frames(seed)
+    day = DAYS[1]
+    index = AsOfIndex(dfs, day)
+    start = local_day_start_ns(day)
+    step = ASOF_CHECKPOINT_MINUTES * NS_PER_MIN
+    event_ts = int(dfs["status"]["Timestamp"].dropna().iloc[len(dfs["status"]) // 2])
+    for as_of in [start - 60 * NS_PER_MIN, start, start + 7 * NS_PER_MIN, start + 4 * step,
+                  start + 4 * step + 1, event_ts, start + 12 * 60 * NS_PER_MIN,
+                  local_day_start_ns(day + timedelta(days=1)) - 1]:
+        view = index.view(as_of)
+        expected = compute_per_truck_metrics(*_args(view.dfs))
+        assert_frame_equal(compute_per_truck_metrics(*_args(view.dfs), engine=view), expected)
+
+
+def test_filter_index_matches_filtered_metrics():
+    dfs = messy_frames(0)
+    kpi = compute_per_truck_metrics(*_args(dfs))
+    index = KpiFilterIndex(kpi, dfs["security"])
+    for selected_date in [None, *DAYS, date(2026, 9, 30)]:
+        for product_filter in [None, [], ["Pipe"], ["Coil", "Roofing"], ["Trading"]]:
+            for upload_type in [None, "Uploading", "Unloading"]:
+                expected = compute_per_truck_metrics(
+                    *_args(dfs), selected_date=selected_date, product_filter=product_filter,
+                    upload_type=upload_type)
+                assert_frame_equal(index.select(selected_date, product_filter, upload_type), expected)
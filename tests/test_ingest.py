@@ -0,0 +1,56 @@
+# tests/test_ingest.py
+"""
+Pushed rows (data/ingest.py) merged into a raw snapshot and cleaned like the sheet rows.
+
+    python -m pytest -q
+"""
+from datetime import date, time
+
+import pandas as pd
+import pytest
+
+import data.ingest as ingest
+from data.processor import clean_sheet_dfs
+from utils.time_utils import local_datetime_ns
+
+DAY = date(2026, 10, 19)
+
+
+def _raw(times):
+    """Raw snapshot whose status sheet has an Arrival of plate A1 at each of `times`."""
+    status = pd.DataFrame({
+        "Timestamp": times,
+        "ស្លាកលេខឡាន": ["A1"] * len(times),
+        "ប្រភេទទំនិញ": ["ទីប ជ្រុង ទីបមូល"] * len(times),
+        "Status": ["មកដល់ច្រករង់ចាំ /Arrival"] * len(times),
+    })
+    empty = pd.DataFrame({"Timestamp": pd.Series(dtype=str), "ស្លាកលេខឡាន": pd.Series(dtype=str)})
+    return {"security": empty, "driver": empty, "status": status, "logistic": empty}
+
+
+@pytest.fixture(autouse=True)
+def pending(monkeypatch):
+    monkeypatch.setattr(ingest, "_pending", {name: [] for name in ingest.SHEET_RENAMES})
+
+
+def _push(ts, plate="B2"):
+    ingest.push_rows("status", {"Timestamp": ts, "Truck_Plate_Number": plate, "Status": "Start_Loading"})
+
+
+@pytest.mark.parametrize("pushed, expected", [
+    ("2026-10-19T09:00:00", local_datetime_ns(DAY, time(9))),
+    ("2026-10-19T02:00:00+00:00", pd.Timestamp("2026-10-19T02:00:00Z").value),
+])
+def test_pushed_timestamp_in_another_format_survives_cleaning(pushed, expected):
+    _push(pushed)
+    status = clean_sheet_dfs(ingest.merge_pushed_rows(_raw(["10/19/2026 08:00:00"])))["status"]
+    assert status["Timestamp"].notna().all()
+    assert status["Timestamp"].iloc[-1] == expected
+
+
+def test_pushed_row_in_another_format_is_reconciled_by_the_export():
+    _push("2026-10-19T09:00:00", plate="A1")
+    assert len(ingest.merge_pushed_rows(_raw(["10/19/2026 08:00:00"]))["status"]) == 2
+    merged = ingest.merge_pushed_rows(_raw(["10/19/2026 08:00:00", "10/19/2026 09:00:00"]))
+    assert len(merged["status"]) == 2
+    assert ingest.pending_counts()["status"] == 0
@@ -0,0 +1,43 @@
+# tests/test_sketches.py
+"""
+Per-day SLA sketches (data/sketches.py) are cached per site: two sites with visits on the
+same day keep their own sketches.
+
+    python -m pytest -q
+"""
+from datetime import date
+
+import pandas as pd
+import pytest
+
+import data.sketches as sketches
+from data.sketches import update_day_sketches
+
+DAY = date(2026, 10, 19)
+
+
+@pytest.fixture(autouse=True)
+def fresh_cache(monkeypatch):
+    monkeypatch.setattr(sketches, "_day_cache", {})
+
+
+def _kpi(waiting):
+    return pd.DataFrame({"Date": [DAY] * len(waiting), "Product_Group": ["Pipe"] * len(waiting),
+                         "Direction": ["Uploading"] * len(waiting), "Waiting_min": waiting,
+                         "Loading_min": [10.0] * len(waiting)})
+
+
+def _p50(site, waiting):
+    return update_day_sketches(_kpi(waiting), site)[DAY][("Pipe", "Uploading", "Waiting_min")].quantile(0.5)
+
+
+def test_sites_keep_their_own_day_sketches():
+    a = _p50("a", [10.0, 10.0, 10.0])
+    b = _p50("b", [60.0, 60.0, 60.0])
+    assert a == pytest.approx(10, rel=0.01)
+    assert b == pytest.approx(60, rel=0.01)
+    assert set(sketches._day_cache) == {("a", DAY), ("b", DAY)}
+
+    cached = sketches._day_cache[("a", DAY)][1]
+    update_day_sketches(_kpi([10.0, 10.0, 10.0]), "a")
+    assert sketches._day_cache[("a", DAY)][1] is cached    # unchanged rows: no rebuild
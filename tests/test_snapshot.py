@@ -0,0 +1,66 @@
+# tests/test_snapshot.py
+"""
+Stage memoization (data/snapshot.py): results of an older snapshot version are dropped once
+a newer one is stored, per site, and a stage whose inputs didn't change keeps its entry.
+
+    python -m pytest -q
+"""
+import pandas as pd
+import pytest
+
+import data.snapshot as snapshot
+from data.snapshot import build_manifest, memoize_stage, stage_key
+
+
+@pytest.fixture(autouse=True)
+def fresh_state(monkeypatch):
+    monkeypatch.setattr(snapshot, "_state", {})
+    monkeypatch.setattr(snapshot, "_stage_cache", {})
+
+
+def _manifest(site, status_rows):
+    frame = pd.DataFrame({"Timestamp": ["10/19/2026 08:00:00"] * status_rows})
+    return build_manifest({"status": frame, "logistic": frame.head(1)}, site)
+
+
+def _store(name, manifest, sheets=snapshot.SHEET_NAMES, extra=()):
+    return memoize_stage(name, stage_key(manifest, sheets, extra), lambda: manifest["version"])
+
+
+def _cached(name):
+    """site -> the extra argument of each cached entry, oldest first."""
+    cached = {}
+    for key in snapshot._stage_cache[name]:
+        cached.setdefault(key[0], []).append(key[-1])
+    return cached
+
+
+def test_newer_version_drops_older_entries_of_the_same_site():
+    a1, b1 = _manifest("a", 1), _manifest("b", 1)
+    for extra in ("x", "y"):
+        _store("kpi", a1, extra=(extra,))
+        _store("kpi", b1, extra=(extra,))
+    a2 = _manifest("a", 2)
+    assert a2["version"] == 2
+    assert _store("kpi", a2, extra=("x",)) == 2
+    assert _cached("kpi") == {"a": ["x"], "b": ["x", "y"]}
+
+
+def test_unchanged_stage_keeps_its_entry_across_versions():
+    a1 = _manifest("a", 1)
+    _store("logistic_only", a1, sheets=("logistic",), extra=("x",))
+    a2 = _manifest("a", 2)   # only the status sheet changed
+    assert _store("logistic_only", a2, sheets=("logistic",), extra=("x",)) == 1
+    _store("logistic_only", a2, sheets=("logistic",), extra=("y",))
+    assert _cached("logistic_only") == {"a": ["x", "y"]}
+
+
+def test_entries_are_bounded_per_site():
+    a1, b1 = _manifest("a", 1), _manifest("b", 1)
+    _store("kpi", b1, extra=(0,))
+    for i in range(snapshot._MAX_ENTRIES_PER_STAGE + 3):
+        _store("kpi", a1, extra=(i,))
+    cached = _cached("kpi")
+    assert len(cached["a"]) == snapshot._MAX_ENTRIES_PER_STAGE
+    assert cached["a"][-1] == snapshot._MAX_ENTRIES_PER_STAGE + 2
+    assert cached["b"] == [0]
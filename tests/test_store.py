@@ -0,0 +1,90 @@
+# tests/test_store.py
+"""
+EventStore ingestion against sheets that change under it: edited rows, pushed rows that
+later reach the export, and status events sharing a timestamp.
+
+    python -m pytest -q
+"""
+from datetime import date
+
+import pandas as pd
+import pytest
+
+import data.ingest as ingest
+from data.processor import STATUS_RENAME, clean_sheet_dfs, product_map, status_map_full
+from data.snapshot import sheet_hash
+from data.store import EventStore
+
+DAY = date(2026, 10, 19)
+RAW_STATUS = {v: k for k, v in status_map_full.items()}
+RAW_PRODUCT = {v: k for k, v in product_map.items()}
+RAW_COLUMNS = {v: k for k, v in STATUS_RENAME.items()}
+
+
+def _raw(status_rows):
+    """Raw snapshot with status rows (time, plate, status, product or None); other sheets empty."""
+    status = pd.DataFrame([
+        {"Timestamp": f"10/19/2026 {t}", RAW_COLUMNS["Truck_Plate_Number"]: plate,
+         RAW_COLUMNS["Product_Group"]: RAW_PRODUCT.get(product), "Status": RAW_STATUS[state]}
+        for t, plate, state, product in status_rows
+    ])
+    empty = pd.DataFrame({"Timestamp": pd.Series(dtype=str), "ស្លាកលេខឡាន": pd.Series(dtype=str)})
+    return {"security": empty, "driver": empty, "status": status, "logistic": empty}
+
+
+def _ingest(store, raw):
+    return store.ingest_frames(clean_sheet_dfs(raw), {name: sheet_hash(df) for name, df in raw.items()})
+
+
+def _status_events(store):
+    return store._query("SELECT plate, status FROM events WHERE sheet = 'status' ORDER BY seq")
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = EventStore(str(tmp_path / "events.db"))
+    yield store
+    store.close()
+
+
+def test_edited_row_replaces_the_stored_one(store):
+    rows = [("08:00:00", "A1", "Arrival", "Pipe"),
+            ("08:30:00", "A9", "Start_Loading", "Pipe"),   # plate typo
+            ("09:00:00", "A1", "Completed", "Pipe")]
+    _ingest(store, _raw(rows))
+    rows[1] = ("08:30:00", "A1", "Start_Loading", "Pipe")
+    _ingest(store, _raw(rows))
+
+    assert _status_events(store) == [("A1", "Arrival"), ("A1", "Start_Loading"), ("A1", "Completed")]
+    assert store.plates_on(DAY) == ["A1"]
+    assert store.status_counts(DAY) == {"Completed": 1}
+
+
+def test_appended_rows_keep_the_stored_ones(store):
+    rows = [("08:00:00", "A1", "Arrival", "Pipe")]
+    assert _ingest(store, _raw(rows)) == 1
+    rows.append(("08:30:00", "A1", "Start_Loading", "Pipe"))
+    assert _ingest(store, _raw(rows)) == 1
+    assert _status_events(store) == [("A1", "Arrival"), ("A1", "Start_Loading")]
+
+
+def test_pushed_row_that_reaches_the_sheet_is_stored_once(store, monkeypatch):
+    monkeypatch.setattr(ingest, "_pending", {name: [] for name in ingest.SHEET_RENAMES})
+    sheet = [("08:00:00", "A1", "Arrival", "Pipe")]
+    ingest.push_rows("status", {"Timestamp": "10/19/2026 08:30:00", "Truck_Plate_Number": "A1",
+                                "Status": "Start_Loading"})
+    _ingest(store, ingest.merge_pushed_rows(_raw(sheet)))
+    assert _status_events(store) == [("A1", "Arrival"), ("A1", "Start_Loading")]
+
+    # the export now has the scan (with its product, so a different row hash)
+    sheet.append(("08:30:00", "A1", "Start_Loading", "Pipe"))
+    _ingest(store, ingest.merge_pushed_rows(_raw(sheet)))
+    assert _status_events(store) == [("A1", "Arrival"), ("A1", "Start_Loading")]
+    assert store.status_counts(DAY) == {"Start_Loading": 1}
+
+
+def test_status_counts_counts_a_tie_once(store):
+    _ingest(store, _raw([("08:00:00", "A1", "Arrival", "Pipe"),
+                         ("09:00:00", "A1", "Start_Loading", "Pipe"),
+                         ("09:00:00", "A1", "Completed", "Pipe")]))
+    assert store.status_counts(DAY) == {"Completed": 1}
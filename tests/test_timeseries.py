@@ -0,0 +1,46 @@
+# tests/test_timeseries.py
+"""
+Yard activity series (data/timeseries.py) cut at `now`: a truck that hasn't started loading
+is waiting up to now and doesn't show up in later buckets.
+
+    python -m pytest -q
+"""
+from datetime import date, time
+
+import numpy as np
+import pandas as pd
+
+from data.timeseries import BUCKET_NS, activity_series, visit_intervals
+from utils.time_utils import local_datetime_ns
+
+DAY = date(2026, 10, 19)
+
+
+def _visits():
+    kpi = pd.DataFrame({
+        "Truck_Plate_Number": ["A1", "B1"],
+        "Arrival_Time": pd.array([local_datetime_ns(DAY, time(8)), local_datetime_ns(DAY, time(9))], dtype="Int64"),
+        "Start_Loading_Time": pd.array([local_datetime_ns(DAY, time(8, 30)), None], dtype="Int64"),
+        "Waiting_min": [30.0, np.nan],
+        "Product_Group": ["Pipe", "Coil"],
+    })
+    trucks = pd.DataFrame({"Coming_to_Upload_or_Unload": ["Uploading", "Unloading"]}, index=["A1", "B1"])
+    return visit_intervals(kpi, trucks)
+
+
+def test_waiting_series_ends_at_now():
+    now = local_datetime_ns(DAY, time(9, 40))
+    times, waiting = activity_series(_visits(), DAY, DAY, now=now)["waiting"]
+    assert times.max() < now
+    assert times.max() + BUCKET_NS >= now
+    assert waiting[-1] == 1     # B1 still waiting at now
+
+
+def test_time_travel_cuts_at_the_as_of_time():
+    as_of = local_datetime_ns(DAY, time(8, 15))
+    series = activity_series(_visits(), DAY, DAY, now=as_of)
+    assert series["waiting"][0].max() < as_of
+    hours, rate = series["arrivals"]
+    assert len(hours) == 9 and rate.sum() == 1      # 00:00..08:00, only A1 has arrived
+    assert series["median"] == {}
+    assert activity_series(_visits(), DAY, DAY, now=local_datetime_ns(DAY, time(0)) - 1) is None
@@ -1,112 +1,103 @@
 # utils/time_utils.py
-from datetime import datetime
+import contextvars
+from datetime import datetime, time
 import pandas as pd
 import pytz
-import numpy as np
-from typing import Dict
 
 from config.config import LOCAL_TZ
 
 TZ = pytz.timezone(LOCAL_TZ)
 
+# Timezone of the site being processed/viewed (multi-site: see config.SITES). Defaults to LOCAL_TZ;
+# a context variable so each Streamlit session thread / worker thread can pick its own site.
+_active_tz = contextvars.ContextVar("active_tz", default=TZ)
 
-def now_local():
-    """
-    Return timezone-aware current time in LOCAL_TZ.
-    Use this instead of datetime.now() in all waiting calculations.
-    """
-    return datetime.now(TZ)
 
+def set_active_tz(tz_name):
+    """Use `tz_name` for parsing, local dates and display in the current context."""
+    _active_tz.set(pytz.timezone(tz_name))
 
-def _is_mostly_numeric(series: pd.Series, threshold: float = 0.5) -> bool:
-    """Heuristic: are >threshold fraction of entries numeric-like?"""
-    numeric = pd.to_numeric(series, errors="coerce")
-    return numeric.notna().sum() / max(1, len(series)) > threshold
-
-
-def normalize_timestamp_series(series: pd.Series) -> pd.Series:
-    """
-    Convert a Series of timestamps (strings / numeric / datetimes) into tz-aware datetimes in LOCAL_TZ.
-    Handles:
-      - ISO strings with timezone info (pandas with utc=True will parse those)
-      - Naive strings -> interpreted as LOCAL_TZ
-      - Excel/Sheets serial numbers (floats/ints) -> converted via origin '1899-12-30'
-    Returns a Series of dtype datetime64[ns, tz] (or all NaT if parsing fails).
-    """
-    s = series.copy()
 
-    # If data is already datetime dtype with tz info, convert to LOCAL_TZ
-    if pd.api.types.is_datetime64tz_dtype(s.dtype):
-        return s.dt.tz_convert(TZ)
+def active_tz():
+    return _active_tz.get()
 
-    # If many numeric-like values, treat them as Excel/Sheets serial dates
-    if _is_mostly_numeric(s):
-        numeric = pd.to_numeric(s, errors="coerce")
-        parsed = pd.to_datetime(numeric, unit="d", origin="1899-12-30", errors="coerce")
-        parsed = parsed.dt.tz_localize(TZ)
-        return parsed
+# Engine time representation: event times are nullable Int64 nanoseconds since the UTC epoch.
+# Durations/comparisons are integer math; LOCAL_TZ is applied only for display (epoch_to_local).
+NS_PER_MIN = 60 * 10**9
 
-    # First attempt: parse with utc=True to catch tz-aware strings (gives tz-aware UTC)
-    parsed = pd.to_datetime(s, errors="coerce", utc=True)
 
-    # For parsed NaT items, maybe they were naive strings -> parse and then localize
-    mask_nat = parsed.isna()
-    if mask_nat.any():
-        parsed_naive = pd.to_datetime(s[mask_nat], errors="coerce")
-        # localize naive datetimes to LOCAL_TZ (interpret values as LOCAL_TZ)
-        parsed_naive = parsed_naive.dt.tz_localize(TZ)
-        parsed.loc[mask_nat] = parsed_naive
+def now_local():
+    """
+    Return timezone-aware current time in LOCAL_TZ (the active site's timezone).
+    Use this instead of datetime.now() in all waiting calculations.
+    """
+    return datetime.now(active_tz())
 
-    # Finally convert all to LOCAL_TZ (items parsed as UTC will be converted)
-    parsed = parsed.dt.tz_convert(TZ)
 
-    return parsed
+def now_epoch_ns() -> int:
+    """Current time as UTC epoch nanoseconds (derived from now_local(), the single clock source)."""
+    return pd.Timestamp(now_local()).value
 
 
-def normalize_dfs_timestamps(dfs: Dict[str, pd.DataFrame], candidate_cols=None) -> Dict[str, pd.DataFrame]:
+def to_epoch_ns(series: pd.Series) -> pd.Series:
     """
-    For each DataFrame in dict `dfs`, attempt to find timestamp-like columns and normalize them to tz-aware datetimes.
-    Standard targets:
-      - column named 'Timestamp'
-      - columns containing 'time', 'date', 'arrival', 'ts' (case-insensitive)
-    You can pass `candidate_cols` (list) to force specific names.
-    Returns the modified dfs (in-place modified).
+    Convert timestamps (strings / sheet serials / naive or tz-aware datetimes) to Int64 UTC epoch ns.
+    Naive values are interpreted as LOCAL_TZ wall time. Integer input is assumed to be epoch ns already.
     """
-    if candidate_cols is None:
-        candidate_cols = []
-
-    for name, df in dfs.items():
-        if df is None or df.empty:
-            continue
-        # lower-case column map
-        cols = list(df.columns)
-        lower_map = {c: c.lower() for c in cols}
-        # build list of candidates from heuristics
-        to_check = set()
-
-        # explicit candidate names
-        for c in candidate_cols:
-            if c in df.columns:
-                to_check.add(c)
-
-        # typical names
-        for c_orig, c_low in lower_map.items():
-            if c_low in ['timestamp', 'time', 'arrival', 'arrival_time', 'arrival_at', 'created_at', 'updated_at', 'date', 'datetime']:
-                to_check.add(c_orig)
-            # contains patterns
-            if any(k in c_low for k in ['time', 'date', 'arrival', 'ts', 'at']):
-                to_check.add(c_orig)
-
-        # Normalize found columns
-        for col in list(to_check):
-            try:
-                df[col] = normalize_timestamp_series(df[col])
-            except Exception:
-                # If normalization fails, attempt a safe fallback conversion
-                try:
-                    df[col] = pd.to_datetime(df[col], errors="coerce").dt.tz_localize(TZ)
-                except Exception:
-                    # give up silently and leave as-is
-                    pass
-
-    return dfs
+    if pd.api.types.is_integer_dtype(series.dtype):
+        return series.astype("Int64")
+    tz = active_tz()
+    if isinstance(series.dtype, pd.DatetimeTZDtype):
+        parsed = series
+    elif _is_mostly_numeric(series):
+        numeric = pd.to_numeric(series, errors="coerce")
+        parsed = pd.to_datetime(numeric, unit="d", origin="1899-12-30", errors="coerce").dt.tz_localize(tz)
+    else:
+        try:
+            parsed = pd.to_datetime(series, errors="coerce")
+        except ValueError:
+            # mixed offsets -> let pandas resolve them via UTC
+            parsed = pd.to_datetime(series, errors="coerce", utc=True)
+        if not pd.api.types.is_datetime64_any_dtype(parsed.dtype):
+            parsed = pd.to_datetime(series, errors="coerce", utc=True)
+        elif parsed.dt.tz is None:
+            parsed = parsed.dt.tz_localize(tz, ambiguous="NaT", nonexistent="NaT")
+    ns = parsed.dt.tz_convert("UTC").dt.tz_localize(None).to_numpy(dtype="datetime64[ns]").view("int64")
+    out = pd.Series(ns, index=series.index, name=series.name).astype("Int64")
+    out[parsed.isna().to_numpy()] = pd.NA
+    return out
+
+
+def epoch_to_local(series: pd.Series) -> pd.Series:
+    """Int64 epoch ns -> tz-aware datetimes in LOCAL_TZ (display layer only)."""
+    return pd.to_datetime(series, unit="ns", utc=True).dt.tz_convert(active_tz())
+
+
+def epoch_local_date(series: pd.Series) -> pd.Series:
+    """Calendar date in LOCAL_TZ for each epoch ns value (NaT where missing)."""
+    return epoch_to_local(series).dt.date
+
+
+def local_datetime_ns(day, t=time.min) -> int:
+    """Epoch ns of local wall time `t` on `day`."""
+    return pd.Timestamp(active_tz().localize(datetime.combine(day, t))).value
+
+
+def local_day_start_ns(day) -> int:
+    """Epoch ns of local midnight at the start of `day`."""
+    return local_datetime_ns(day)
+
+
+def localize_frame(df: pd.DataFrame, cols) -> pd.DataFrame:
+    """Copy of df with the given epoch ns columns converted to LOCAL_TZ datetimes for display."""
+    out = df.copy()
+    for c in cols:
+        if c in out.columns and pd.api.types.is_integer_dtype(out[c].dtype):
+            out[c] = epoch_to_local(out[c])
+    return out
+
+
+def _is_mostly_numeric(series: pd.Series, threshold: float = 0.5) -> bool:
+    """Heuristic: are >threshold fraction of entries numeric-like?"""
+    numeric = pd.to_numeric(series, errors="coerce")
+    return numeric.notna().sum() / max(1, len(series)) > threshold